@@ -27,7 +27,9 @@
 # def handle_miscellaneous_query(query: str) -> dict:
 #     return {"response": misc_bot(query)}
 
-from functools import lru_cache
+from functools import lru_cache, partial
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Mapping, Optional
 from bots.tralli_place_bot import PlaceBot
 from bots.tralli_food_bot import FoodBot
 from bots.tralli_shop_bot import ShopBot
@@ -41,37 +43,95 @@ from bots.tralli_cityinfo_bot import CityInfoBot
 from bots.tralli_connectivity_bot import ConnectivityBot
 from bots.tralli_misc_structured_bot import MiscBot
 from bots.tralli_misc_bot import misc_bot  # legacy fallback
+from service.city_data import list_data_cities
+from service.clients import get_groq_client, get_vector_index
+from service.async_utils import run_blocking
+
+# category -> (bot class, entry-point method)
+BOT_REGISTRY = {
+    "place": (PlaceBot, "place_bot"),
+    "food": (FoodBot, "food_bot"),
+    "shop": (ShopBot, "shop_bot"),
+    "transport": (TransportBot, "transport_bot"),
+    "accommodation": (AccommodationBot, "accommodation_bot"),
+    "activity": (ActivityBot, "activity_bot"),
+    "hiddengem": (HiddenGemBot, "hiddengem_bot"),
+    "itinerary": (ItineraryBot, "itinerary_bot"),
+    "nearbyspot": (NearbySpotBot, "nearbyspot_bot"),
+    "cityinfo": (CityInfoBot, "cityinfo_bot"),
+    "connectivity": (ConnectivityBot, "connectivity_bot"),
+    "misc": (MiscBot, "misc_bot"),
+}
+
+
+class CityHandlers(Mapping):
+    """Lazily-populated category -> handler map for one city.
+
+    A category's bot is constructed (once, thread-safely) on its first call, so a
+    cold city pays one bot init instead of twelve and unused categories allocate nothing.
+    A city without a data/ directory maps no categories, so the mapping is falsy.
+    """
+
+    def __init__(self, city: str):
+        self.city = city
+        self._categories = tuple(BOT_REGISTRY) if city in list_data_cities() else ()
+        self._bots: Dict[str, Any] = {}
+        self._lock = Lock()
+
+    def bot(self, category: str) -> Any:
+        bot = self._bots.get(category)
+        if bot is None:
+            with self._lock:
+                bot = self._bots.get(category)
+                if bot is None:
+                    cls, _ = BOT_REGISTRY[category]
+                    # One index handle and one Groq client shared by every bot and city
+                    bot = cls(self.city, index=get_vector_index(), groq_client=get_groq_client())
+                    self._bots[category] = bot
+        return bot
+
+    def _handle(self, category: str, query: str, qvec: Optional[List[float]] = None) -> Dict[str, Any]:
+        try:
+            bot = self.bot(category)
+        except Exception as e:
+            print(f"Error initializing {category} bot for city '{self.city}':", e)
+            if category == "misc":
+                return {"results": [misc_bot(query)]}
+            raise
+        return getattr(bot, BOT_REGISTRY[category][1])(query, qvec=qvec)
+
+    async def ahandle(self, category: str, query: str, qvec: Optional[List[float]] = None) -> Dict[str, Any]:
+        """Native-async twin of the handler: embedding, search and LLM calls await on the event loop."""
+        if category not in BOT_REGISTRY:
+            category = "misc"
+        try:
+            bot = self.bot(category)
+        except Exception as e:
+            print(f"Error initializing {category} bot for city '{self.city}':", e)
+            if category == "misc":
+                return {"results": [await run_blocking(misc_bot, query)]}
+            raise
+        method = BOT_REGISTRY[category][1]
+        amethod = getattr(bot, "a" + method, None)
+        if amethod is None:
+            return await run_blocking(getattr(bot, method), query, qvec=qvec)
+        return await amethod(query, qvec=qvec)
+
+    def __getitem__(self, category: str):
+        if category not in self._categories:
+            raise KeyError(category)
+        return partial(self._handle, category)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._categories)
+
+    def __len__(self) -> int:
+        return len(self._categories)
+
+    def loaded(self) -> list:
+        return list(self._bots)
+
 
 @lru_cache(maxsize=8)
 def get_city_handlers(city: str):
-    try:
-        place = PlaceBot(city)
-        food = FoodBot(city)
-        shop = ShopBot(city)
-        transport = TransportBot(city)
-        accommodation = AccommodationBot(city)
-        activity = ActivityBot(city)
-        hidden = HiddenGemBot(city)
-        itinerary = ItineraryBot(city)
-        nearby = NearbySpotBot(city)
-        cityinfo = CityInfoBot(city)
-        connectivity = ConnectivityBot(city)
-        misc_struct = MiscBot(city)
-
-        return {
-            "place": lambda q: place.place_bot(q),
-            "food": lambda q: food.food_bot(q),
-            "shop": lambda q: shop.shop_bot(q),
-            "transport": lambda q: transport.transport_bot(q),
-            "accommodation": lambda q: accommodation.accommodation_bot(q),
-            "activity": lambda q: activity.activity_bot(q),
-            "hiddengem": lambda q: hidden.hiddengem_bot(q),
-            "itinerary": lambda q: itinerary.itinerary_bot(q),
-            "nearbyspot": lambda q: nearby.nearbyspot_bot(q),
-            "cityinfo": lambda q: cityinfo.cityinfo_bot(q),
-            "connectivity": lambda q: connectivity.connectivity_bot(q),
-            "misc": lambda q: misc_struct.misc_bot(q) if misc_struct else {"results": [misc_bot(q)]},
-        }
-    except Exception as e:
-        print(f"Error initializing bots for city '{city}':", e)
-        return None
+    return CityHandlers(city)
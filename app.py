@@ -3,6 +3,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 # from service.query_classifier import classify_query_with_gemini
 from routers.tralli_router import router as tralli_router
+from service.retrieval import aclose_http, build_lexical_indexes
+from service.centroid_router import build_centroids
+from service.city_data import list_data_cities
+from service.geo_index import get_geo_index
 import os
 
 app = FastAPI()
@@ -32,6 +36,26 @@ def read_root():
 
 app.include_router(tralli_router)
 
+@app.on_event("startup")
+def build_geo_indexes():
+    # A few hundred points per city; build up front so /tralli/nearby never pays for it
+    for city in list_data_cities():
+        get_geo_index(city)
+
+@app.on_event("startup")
+def build_query_router():
+    # Centroids come from the local vector cache only; cities without one route via Gemini
+    build_centroids(list_data_cities())
+
+@app.on_event("startup")
+def build_bm25_indexes():
+    # Only with HYBRID_SEARCH=1; keeps the cold BM25 build out of the first request
+    build_lexical_indexes(list_data_cities())
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await aclose_http()
+
 # Server startup for production deployment
 if __name__ == "__main__":
     import uvicorn
@@ -1,43 +1,40 @@
 import os
-from typing import List, Dict, Any
+from typing import List, Optional, Dict, Any
 from groq import Groq
 from dotenv import load_dotenv
 from service.embeddings import get_embeddings
 from langchain.schema import Document
-from pinecone import Pinecone
 from service.metadata_order import ordered_meta
+from service.clients import get_groq_client, get_vector_index
+from service.retrieval import aquery_matches, query_matches, to_documents
 
 load_dotenv()
 
 class CityInfoBot:
-    def __init__(self, city: str):
+    def __init__(self, city: str, index: Optional[Any] = None, groq_client: Optional[Groq] = None):
         self.city = city.lower()
-        self.groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        # Shared clients come from get_city_handlers; default to the process-wide singletons
+        self.groq_client = groq_client or get_groq_client()
         self.embeddings = get_embeddings()
         self.namespace = f"CityInfo-{self.city.title()}"
+        self.index = index if index is not None else get_vector_index()
+
+    def _query(self, query: str, k: int = 2, qvec: Optional[List[float]] = None) -> List[Document]:
+        if not self.index:
+            return []
         try:
-            api_key = os.getenv("PINECONE_API_KEY")
-            index_name = os.getenv("PINECONE_INDEX", "ycrag-travel")
-            self.pc = Pinecone(api_key=api_key) if api_key else None
-            self.index = self.pc.Index(index_name) if self.pc else None
+            vec = qvec or self.embeddings.embed_query(query)
+            return to_documents(query_matches(self.index, self.namespace, vec, k, text=query))
         except Exception as e:
-            print("Pinecone init error:", e)
-            self.index = None
+            print("Pinecone query error:", e)
+            return []
 
-    def _query(self, query: str, k: int = 2) -> List[Document]:
+    async def _aquery(self, query: str, k: int = 2, qvec: Optional[List[float]] = None) -> List[Document]:
         if not self.index:
             return []
         try:
-            vec = self.embeddings.embed_query(query)
-            res = self.index.query(
-                vector=vec, 
-                top_k=k, 
-                include_metadata=True, 
-                include_values=False,
-                namespace=self.namespace
-            )
-            matches = getattr(res, "matches", []) or res.get("matches", [])
-            return [Document(page_content="", metadata=m.metadata if hasattr(m, "metadata") else m.get("metadata", {})) for m in matches]
+            vec = qvec or await self.embeddings.aembed_query(query)
+            return to_documents(await aquery_matches(self.index, self.namespace, vec, k, text=query))
         except Exception as e:
             print("Pinecone query error:", e)
             return []
@@ -63,10 +60,14 @@ Return 3 bullet points summarizing answer.
         )
         return resp.choices[0].message.content
 
-    def cityinfo_bot(self, query: str, k: int = 2) -> Dict[str, Any]:
+    def cityinfo_bot(self, query: str, k: int = 2, qvec: Optional[List[float]] = None) -> Dict[str, Any]:
         # Force k to 2 to keep top_k fixed and return most relevant results
-        docs = self._query(query, k=2)
-        return {"results": [ordered_meta(d.metadata) for d in docs]}
+        docs = self._query(query, k=2, qvec=qvec)
+        return {"results": [ordered_meta(d.metadata, content_type="cityinfo") for d in docs]}
+
+    async def acityinfo_bot(self, query: str, k: int = 2, qvec: Optional[List[float]] = None) -> Dict[str, Any]:
+        docs = await self._aquery(query, k=2, qvec=qvec)
+        return {"results": [ordered_meta(d.metadata, content_type="cityinfo") for d in docs]}
 
 if __name__ == "__main__":
     pass
@@ -146,58 +146,48 @@ from groq import Groq
 from typing import List, Optional, Dict, Any
 from dotenv import load_dotenv
 from service.embeddings import get_embeddings
-from pinecone import Pinecone
 from service.metadata_order import ordered_meta
+from service.clients import get_groq_client, get_vector_index
+from service.retrieval import aquery_matches, query_matches, to_documents
+from service.metadata_filters import build_filter
 from langchain.schema import Document
 
 class FoodBot:
-    def __init__(self, city: str):
+    def __init__(self, city: str, index: Optional[Any] = None, groq_client: Optional[Groq] = None):
         self.city = city.lower()
-        self.groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        # Shared clients come from get_city_handlers; default to the process-wide singletons
+        self.groq_client = groq_client or get_groq_client()
         self.embeddings = get_embeddings()
         self.namespace = f"Food-{self.city.title()}"
+        self.index = index if index is not None else get_vector_index()
+
+    def _filter(self, category_filter: Optional[str], min_rating: Optional[float], min_hygiene: Optional[float], min_value: Optional[float]) -> Optional[Dict[str, Any]]:
+        # Executed by the retrieval engine (Pinecone filter / local index masks), not on the top-k afterwards
+        return build_filter(category=category_filter, min_taste=min_rating, min_hygiene=min_hygiene, min_value=min_value)
+
+    def _get_relevant_docs(self, query: str, category_filter: Optional[str] = None, min_rating: Optional[float] = None, k: int = 2, qvec: Optional[List[float]] = None, min_hygiene: Optional[float] = None, min_value: Optional[float] = None) -> List[Document]:
+        if not self.index:
+            return []
+        flt = self._filter(category_filter, min_rating, min_hygiene, min_value)
         try:
-            api_key = os.getenv("PINECONE_API_KEY")
-            index_name = os.getenv("PINECONE_INDEX", "ycrag-travel")
-            self.pc = Pinecone(api_key=api_key) if api_key else None
-            self.index = self.pc.Index(index_name) if self.pc else None
+            qvec = qvec or self.embeddings.embed_query(query)
+            docs = to_documents(query_matches(self.index, self.namespace, qvec, k, filter=flt, text=query))
         except Exception as e:
-            print("Pinecone init error:", e)
-            self.index = None
+            print("Pinecone query error:", e)
+            return []
+        return docs
 
-    def _get_relevant_docs(self, query: str, category_filter: Optional[str] = None, min_rating: Optional[float] = None, k: int = 2) -> List[Document]:
+    async def _aget_relevant_docs(self, query: str, category_filter: Optional[str] = None, min_rating: Optional[float] = None, k: int = 2, qvec: Optional[List[float]] = None, min_hygiene: Optional[float] = None, min_value: Optional[float] = None) -> List[Document]:
         if not self.index:
             return []
+        flt = self._filter(category_filter, min_rating, min_hygiene, min_value)
         try:
-            qvec = self.embeddings.embed_query(query)
-            res = self.index.query(
-                vector=qvec,
-                top_k=k,
-                include_metadata=True,
-                include_values=False,
-                namespace=self.namespace,
-            )
-            matches = getattr(res, "matches", []) or res.get("matches", [])
-            docs = [Document(page_content="", metadata=m.metadata if hasattr(m, "metadata") else m.get("metadata", {})) for m in matches]
+            qvec = qvec or await self.embeddings.aembed_query(query)
+            docs = to_documents(await aquery_matches(self.index, self.namespace, qvec, k, filter=flt, text=query))
         except Exception as e:
             print("Pinecone query error:", e)
             return []
-
-        filtered_docs: List[Document] = []
-        for doc in docs:
-            metadata = doc.metadata
-            match = True
-            if category_filter:
-                categories = metadata.get("category", "").lower().split(",")
-                if category_filter.lower() not in categories:
-                    match = False
-            if min_rating is not None and float(metadata.get("taste", 0)) < min_rating:
-                match = False
-            if match:
-                filtered_docs.append(doc)
-                if len(filtered_docs) >= k:
-                    break
-        return filtered_docs[:k] if filtered_docs else docs[:k]
+        return docs
 
     def _generate_response(self, query: str, docs: List[Document]) -> str:
         context = "\n\n".join(
@@ -231,12 +221,16 @@ class FoodBot:
         )
         return response.choices[0].message.content
 
-    def food_bot(self, query: str, category: Optional[str] = None, min_rating: Optional[float] = None) -> Dict[str, Any]:
+    def food_bot(self, query: str, category: Optional[str] = None, min_rating: Optional[float] = None, qvec: Optional[List[float]] = None, min_hygiene: Optional[float] = None, min_value: Optional[float] = None) -> Dict[str, Any]:
         # Force k to 2 to keep top_k fixed and return most relevant results
-        docs = self._get_relevant_docs(query, category_filter=category, min_rating=min_rating, k=2)
-        ordered_results = [ordered_meta(d.metadata) for d in docs]
+        docs = self._get_relevant_docs(query, category_filter=category, min_rating=min_rating, k=2, qvec=qvec, min_hygiene=min_hygiene, min_value=min_value)
+        ordered_results = [ordered_meta(d.metadata, content_type="food") for d in docs]
         return {"results": ordered_results}
 
+    async def afood_bot(self, query: str, category: Optional[str] = None, min_rating: Optional[float] = None, qvec: Optional[List[float]] = None, min_hygiene: Optional[float] = None, min_value: Optional[float] = None) -> Dict[str, Any]:
+        docs = await self._aget_relevant_docs(query, category_filter=category, min_rating=min_rating, k=2, qvec=qvec, min_hygiene=min_hygiene, min_value=min_value)
+        return {"results": [ordered_meta(d.metadata, content_type="food") for d in docs]}
+
 # Example usage
 # if __name__ == "__main__":
 #     bot = FoodBot()
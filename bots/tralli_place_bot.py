@@ -4,26 +4,51 @@ from typing import List, Optional, Dict, Any
 from dotenv import load_dotenv
 from service.embeddings import get_embeddings
 from service.metadata_order import ordered_meta
+from service.clients import get_groq_client, get_vector_index
+from service.retrieval import aquery_matches, query_matches, to_documents
+from service.metadata_filters import build_filter
+from service.city_data import parse_namespace
 from langchain.schema import Document
-from pinecone import Pinecone
 
 load_dotenv()
 
+# Legacy place_data.json sections -> the namespace prefix now holding them
+_SECTION_NAMESPACES = {
+    "places-to-visit": "Place",
+    "hidden-gems": "HiddenGem",
+    "nearby-tourist-spot": "NearbySpot",
+}
+
 class PlaceBot:
-    def __init__(self, city: str):
+    def __init__(self, city: str, index: Optional[Any] = None, groq_client: Optional[Groq] = None):
         self.city = city.lower()
-        self.groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        # Shared clients come from get_city_handlers; default to the process-wide singletons
+        self.groq_client = groq_client or get_groq_client()
         self.embeddings = get_embeddings()
         # Rishikesh new namespace style
         self.namespace = f"Place-{self.city.title()}"
-        try:
-            api_key = os.getenv("PINECONE_API_KEY")
-            index_name = os.getenv("PINECONE_INDEX", "ycrag-travel")
-            self.pc = Pinecone(api_key=api_key) if api_key else None
-            self.index = self.pc.Index(index_name) if self.pc else None
-        except Exception as e:
-            print("Pinecone init error:", e)
-            self.index = None
+        self.index = index if index is not None else get_vector_index()
+
+    def _target(self, category_filter: Optional[str], section_filter: Optional[str]):
+        """(namespace, filter) for the requested section/category.
+
+        The legacy sections now live in their own namespaces, so a section filter
+        selects the namespace; anything else becomes a metadata filter.
+        """
+        namespace = self.namespace
+        section = None
+        if section_filter:
+            prefix = _SECTION_NAMESPACES.get(section_filter.strip().lower())
+            if prefix:
+                namespace = f"{prefix}-{self.city.title()}"
+            else:
+                section = section_filter
+        return namespace, build_filter(category=category_filter, section=section)
+
+    def _content_type(self, section_filter: Optional[str]) -> str:
+        # Canonical key order of whichever namespace _target searched
+        parsed = parse_namespace(self._target(None, section_filter)[0])
+        return parsed[1] if parsed else "place"
 
     def _get_relevant_docs(
         self,
@@ -31,45 +56,37 @@ class PlaceBot:
         category_filter: Optional[str] = None,
         section_filter: Optional[str] = None,
         k: int = 2,
+        qvec: Optional[List[float]] = None,
     ) -> List[Document]:
         if not self.index:
             return []
+        namespace, flt = self._target(category_filter, section_filter)
         try:
-            qvec = self.embeddings.embed_query(query)
-            res = self.index.query(
-                vector=qvec,
-                top_k=max(1, k*2),
-                include_metadata=True,
-                include_values=False,
-                namespace=self.namespace,
-            )
-            matches = getattr(res, "matches", []) or res.get("matches", [])
-            docs = [Document(page_content="", metadata=m.metadata if hasattr(m, "metadata") else m.get("metadata", {})) for m in matches]
+            qvec = qvec or self.embeddings.embed_query(query)
+            docs = to_documents(query_matches(self.index, namespace, qvec, k, filter=flt, text=query))
         except Exception as e:
             print("Pinecone query error:", e)
             return []
-        
-        filtered_docs = []
-        for doc in docs:
-            metadata = doc.metadata
-            match = True
-            
-            if category_filter:
-                categories = metadata.get('category', '').lower().split(',')
-                if category_filter.lower() not in categories:
-                    match = False
-            
-            if section_filter:
-                section = metadata.get('section', '').lower()
-                if section_filter.lower() != section:
-                    match = False
+        return docs
 
-            if match:
-                filtered_docs.append(doc)
-                if len(filtered_docs) >= k * 2:
-                    break
-
-        return filtered_docs[:k] if filtered_docs else docs[:k]
+    async def _aget_relevant_docs(
+        self,
+        query: str,
+        category_filter: Optional[str] = None,
+        section_filter: Optional[str] = None,
+        k: int = 2,
+        qvec: Optional[List[float]] = None,
+    ) -> List[Document]:
+        if not self.index:
+            return []
+        namespace, flt = self._target(category_filter, section_filter)
+        try:
+            qvec = qvec or await self.embeddings.aembed_query(query)
+            docs = to_documents(await aquery_matches(self.index, namespace, qvec, k, filter=flt, text=query))
+        except Exception as e:
+            print("Pinecone query error:", e)
+            return []
+        return docs
 
     def _generate_response(self, query: str, docs: List[Document]) -> str:
         context = "\n\n".join([
@@ -115,7 +132,8 @@ class PlaceBot:
         self,
         query: str,
         category: Optional[str] = None,
-        section: Optional[str] = None
+        section: Optional[str] = None,
+        qvec: Optional[List[float]] = None,
     ) -> Dict[str, Any]:
         """
         Get place recommendations based on query with optional filters
@@ -124,16 +142,29 @@ class PlaceBot:
             query: Natural language search query
             category: Filter by category (e.g., "Religious", "Ghat Experience")
             section: Filter by section ("Places-to-visit", "Hidden-gems", "Nearby-tourist-spot")
+            qvec: Precomputed query embedding; computed here when omitted
             
         Returns:
             String with list of recommended places
         """
         if not self.index:
             return {"results": []}
-        docs = self._get_relevant_docs(query, category_filter=category, section_filter=section)
-        ordered_results = [ordered_meta(d.metadata) for d in docs]
+        docs = self._get_relevant_docs(query, category_filter=category, section_filter=section, qvec=qvec)
+        ordered_results = [ordered_meta(d.metadata, content_type=self._content_type(section)) for d in docs]
         # text removed per updated API contract
         return {"results": ordered_results}
 
+    async def aplace_bot(
+        self,
+        query: str,
+        category: Optional[str] = None,
+        section: Optional[str] = None,
+        qvec: Optional[List[float]] = None,
+    ) -> Dict[str, Any]:
+        if not self.index:
+            return {"results": []}
+        docs = await self._aget_relevant_docs(query, category_filter=category, section_filter=section, qvec=qvec)
+        return {"results": [ordered_meta(d.metadata, content_type=self._content_type(section)) for d in docs]}
+
 if __name__ == "__main__":
     pass
\ No newline at end of file
@@ -16,66 +16,59 @@ from typing import List, Optional, Dict, Any
 from dotenv import load_dotenv
 from service.embeddings import get_embeddings
 from langchain.schema import Document
-from pinecone import Pinecone
 from service.metadata_order import ordered_meta
+from service.clients import get_groq_client, get_vector_index
+from service.retrieval import aquery_matches, query_matches, to_documents
+from service.metadata_filters import build_filter
 
 load_dotenv()
 
 class SouvenirBot:
-    def __init__(self,city:str):
+    def __init__(self, city: str, index: Optional[Any] = None, groq_client: Optional[Groq] = None):
         self.city = city.lower()
-        self.groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        # Shared clients come from get_city_handlers; default to the process-wide singletons
+        self.groq_client = groq_client or get_groq_client()
         self.embeddings = get_embeddings()
         # New namespace for Rishikesh uses Shop- category name
         self.namespace = f"Shop-{self.city.title()}"
-        try:
-            api_key = os.getenv("PINECONE_API_KEY")
-            index_name = os.getenv("PINECONE_INDEX", "ycrag-travel")
-            self.pc = Pinecone(api_key=api_key) if api_key else None
-            self.index = self.pc.Index(index_name) if self.pc else None
-        except Exception as e:
-            print("Pinecone init error:", e)
-            self.index = None
+        self.index = index if index is not None else get_vector_index()
 
     def _get_relevant_docs(
         self,
         query: str,
         category_filter: Optional[str] = None,
         k: int = 2,
+        qvec: Optional[List[float]] = None,
     ) -> List[Document]:
         if not self.index:
             return []
+        # Shops carry no category; categoryTags falls back to their famousFor list
+        flt = build_filter(category=category_filter)
         try:
-            qvec = self.embeddings.embed_query(query)
-            res = self.index.query(
-                vector=qvec,
-                top_k=k,
-                include_metadata=True,
-                include_values=False,
-                namespace=self.namespace,
-            )
-            matches = getattr(res, "matches", []) or res.get("matches", [])
-            docs = [Document(page_content="", metadata=m.metadata if hasattr(m, "metadata") else m.get("metadata", {})) for m in matches]
+            qvec = qvec or self.embeddings.embed_query(query)
+            docs = to_documents(query_matches(self.index, self.namespace, qvec, k, filter=flt, text=query))
         except Exception as e:
             print("Pinecone query error:", e)
             return []
-        
-        filtered_docs = []
-        for doc in docs:
-            metadata = doc.metadata
-            match = True
-            
-            if category_filter:
-                categories = metadata.get('category', '').lower().split(',')
-                if category_filter.lower() not in categories:
-                    match = False
-
-            if match:
-                filtered_docs.append(doc)
-                if len(filtered_docs) >= k:
-                    break
+        return docs
 
-        return filtered_docs[:k] if filtered_docs else docs[:k]
+    async def _aget_relevant_docs(
+        self,
+        query: str,
+        category_filter: Optional[str] = None,
+        k: int = 2,
+        qvec: Optional[List[float]] = None,
+    ) -> List[Document]:
+        if not self.index:
+            return []
+        flt = build_filter(category=category_filter)
+        try:
+            qvec = qvec or await self.embeddings.aembed_query(query)
+            docs = to_documents(await aquery_matches(self.index, self.namespace, qvec, k, filter=flt, text=query))
+        except Exception as e:
+            print("Pinecone query error:", e)
+            return []
+        return docs
 
     def _generate_response(self, query: str, docs: List[Document]) -> str:
         context = "\n\n".join([
@@ -116,7 +109,8 @@ class SouvenirBot:
     def souvenir_bot(
         self,
         query: str,
-        category: Optional[str] = None
+        category: Optional[str] = None,
+        qvec: Optional[List[float]] = None,
     ) -> Dict[str, Any]:
         """
         Get souvenir recommendations based on query with optional filters
@@ -124,6 +118,7 @@ class SouvenirBot:
         Args:
             query: Natural language search query
             category: Filter by category (e.g., "Sarees", "Jewellery")
+            qvec: Precomputed query embedding; computed here when omitted
             
         Returns:
             Dict with list of souvenir shops metadata
@@ -131,9 +126,20 @@ class SouvenirBot:
         if not self.index:
             return {"results": []}
         # Force k to 2 to keep top_k fixed and return most relevant results
-        docs = self._get_relevant_docs(query, category_filter=category, k=2)
-        ordered_results = [ordered_meta(d.metadata) for d in docs]
+        docs = self._get_relevant_docs(query, category_filter=category, k=2, qvec=qvec)
+        ordered_results = [ordered_meta(d.metadata, content_type="shop") for d in docs]
         return {"results": ordered_results}
 
+    async def asouvenir_bot(
+        self,
+        query: str,
+        category: Optional[str] = None,
+        qvec: Optional[List[float]] = None,
+    ) -> Dict[str, Any]:
+        if not self.index:
+            return {"results": []}
+        docs = await self._aget_relevant_docs(query, category_filter=category, k=2, qvec=qvec)
+        return {"results": [ordered_meta(d.metadata, content_type="shop") for d in docs]}
+
 if __name__ == "__main__":
     pass
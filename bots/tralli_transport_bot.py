@@ -4,42 +4,39 @@ from groq import Groq
 from dotenv import load_dotenv
 from service.embeddings import get_embeddings
 from langchain.schema import Document
-from pinecone import Pinecone
 from service.metadata_order import ordered_meta
+from service.clients import get_groq_client, get_vector_index
+from service.retrieval import aquery_matches, query_matches, to_documents
+from service.transport_graph import get_transport_graph
 
 load_dotenv()
 
 
 class TransportBot:
-    def __init__(self, city: str):
+    def __init__(self, city: str, index: Optional[Any] = None, groq_client: Optional[Groq] = None):
         self.city = city.lower()
-        self.groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        # Shared clients come from get_city_handlers; default to the process-wide singletons
+        self.groq_client = groq_client or get_groq_client()
         self.embeddings = get_embeddings()
         self.namespace = f"Transport-{self.city.title()}"
+        self.index = index if index is not None else get_vector_index()
+
+    def _get_relevant_docs(self, query: str, k: int = 2, qvec: Optional[List[float]] = None) -> List[Document]:
+        if not self.index:
+            return []
         try:
-            api_key = os.getenv("PINECONE_API_KEY")
-            index_name = os.getenv("PINECONE_INDEX", "ycrag-travel")
-            self.pc = Pinecone(api_key=api_key) if api_key else None
-            self.index = self.pc.Index(index_name) if self.pc else None
+            qvec = qvec or self.embeddings.embed_query(query)
+            return to_documents(query_matches(self.index, self.namespace, qvec, k, text=query))
         except Exception as e:
-            print("Pinecone init error:", e)
-            self.index = None
+            print("Pinecone query error:", e)
+            return []
 
-    def _get_relevant_docs(self, query: str, k: int = 2) -> List[Document]:
+    async def _aget_relevant_docs(self, query: str, k: int = 2, qvec: Optional[List[float]] = None) -> List[Document]:
         if not self.index:
             return []
         try:
-            qvec = self.embeddings.embed_query(query)
-            res = self.index.query(
-                vector=qvec, 
-                top_k=k, 
-                include_metadata=True, 
-                include_values=False,
-                namespace=self.namespace
-            )
-            matches = getattr(res, "matches", []) or res.get("matches", [])
-            docs = [Document(page_content="", metadata=m.metadata if hasattr(m, "metadata") else m.get("metadata", {})) for m in matches]
-            return docs
+            qvec = qvec or await self.embeddings.aembed_query(query)
+            return to_documents(await aquery_matches(self.index, self.namespace, qvec, k, text=query))
         except Exception as e:
             print("Pinecone query error:", e)
             return []
@@ -71,12 +68,31 @@ class TransportBot:
         )
         return response.choices[0].message.content
 
-    def transport_bot(self, query: str) -> Dict[str, Any]:
+    def _route(self, query: str) -> Optional[List[Dict[str, Any]]]:
+        # Named stops: exact fares (multi-leg if needed) from the route graph, no vector search
+        try:
+            legs = get_transport_graph(self.city).route(query)
+        except Exception as e:
+            print("Transport graph error:", e)
+            return None
+        return [ordered_meta(leg, content_type="transport") for leg in legs] if legs else None
+
+    def transport_bot(self, query: str, qvec: Optional[List[float]] = None) -> Dict[str, Any]:
+        legs = self._route(query)
+        if legs:
+            return {"results": legs}
         # Force k to 2 to keep top_k fixed and return most relevant results
-        docs = self._get_relevant_docs(query, k=2)
-        ordered_results = [ordered_meta(d.metadata) for d in docs]
+        docs = self._get_relevant_docs(query, k=2, qvec=qvec)
+        ordered_results = [ordered_meta(d.metadata, content_type="transport") for d in docs]
         return {"results": ordered_results}
 
+    async def atransport_bot(self, query: str, qvec: Optional[List[float]] = None) -> Dict[str, Any]:
+        legs = self._route(query)
+        if legs:
+            return {"results": legs}
+        docs = await self._aget_relevant_docs(query, k=2, qvec=qvec)
+        return {"results": [ordered_meta(d.metadata, content_type="transport") for d in docs]}
+
 
 if __name__ == "__main__":
     pass
\ No newline at end of file
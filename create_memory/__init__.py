@@ -0,0 +1 @@
+"""Offline indexing of data/<city>/ into Pinecone; run with `python -m create_memory`."""
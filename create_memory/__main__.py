@@ -0,0 +1,3 @@
+from create_memory.indexer import main
+
+main()
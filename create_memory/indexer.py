@@ -0,0 +1,169 @@
+"""Index every city's category datasets into Pinecone, one namespace per category.
+
+    python -m create_memory                       # all cities found under data/
+    python -m create_memory --city agra --city varanasi --category food
+    python -m create_memory --dry-run             # counts and estimated embed calls only
+
+Namespaces follow <Category>-<City> (e.g. HiddenGem-Agra) and vector ids
+<city>-<category>-<idx>. Embedding texts come from the shared TEXT_BUILDERS
+registry in service/text_builders.py. Runs are incremental (see
+service/index_manifest.py); --full re-embeds everything.
+
+Namespaces are processed by --workers threads in two stages: a namespace's
+upserts run on the write pool while its worker moves on to embedding the
+next one.
+"""
+from __future__ import annotations
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import argparse
+import math
+import os
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from dotenv import load_dotenv
+
+ENV_PATH = ROOT / ".env"
+_loaded = load_dotenv(dotenv_path=ENV_PATH, override=True)
+if not _loaded:
+    load_dotenv(override=True)
+
+from service.city_data import CATEGORY_NAMESPACES, category_file, list_data_cities, load_records, namespace_for
+from service.embeddings import EMBEDDING_BATCH_SIZE, get_embeddings
+from service.index_manifest import apply_sync, load_manifest, plan_sync, prepare_sync
+from service.metadata_filters import with_filter_fields
+from service.text_builders import embedding_text
+
+INDEX_WORKERS = int(os.getenv("INDEX_WORKERS", "4"))
+
+
+def discover_cities() -> List[str]:
+    """Cities under data/ that have at least one category file."""
+    return [c for c in list_data_cities() if any(category_file(c, cat) for cat in CATEGORY_NAMESPACES)]
+
+
+def build_payload(city: str, category: str) -> Tuple[List[str], List[Dict[str, Any]]]:
+    records = load_records(city, category)
+    texts = [embedding_text(category, r) for r in records]
+    # metadata is the sanitized original record plus filter fields
+    metas = [with_filter_fields(dict(r)) for r in records]
+    return texts, metas
+
+
+def ensure_index(pc: Any, name: str, dim: int, cloud: str, region: str) -> None:
+    from pinecone import ServerlessSpec
+    if not pc.has_index(name):
+        pc.create_index(
+            name=name,
+            dimension=dim,
+            metric="cosine",
+            spec=ServerlessSpec(cloud=cloud, region=region),
+        )
+
+
+def _jobs(cities: Sequence[str], categories: Sequence[str]) -> List[Tuple[str, str, List[str], List[Dict[str, Any]]]]:
+    jobs = []
+    for city in cities:
+        for category in categories:
+            texts, metas = build_payload(city, category)
+            if not texts:
+                print(f"[SKIP] {namespace_for(city, category)}: no records")
+                continue
+            jobs.append((city, category, texts, metas))
+    return jobs
+
+
+def dry_run(jobs, full: bool) -> None:
+    totals = {"records": 0, "embed": 0, "update": 0, "delete": 0, "calls": 0}
+    for city, category, texts, metas in jobs:
+        namespace = namespace_for(city, category)
+        plan = plan_sync(f"{city}-{category}", texts, metas, load_manifest(namespace), full=full)
+        calls = math.ceil(len(plan.embed) / EMBEDDING_BATCH_SIZE)
+        for key, n in (("records", len(texts)), ("embed", len(plan.embed)), ("update", len(plan.update)), ("delete", len(plan.delete)), ("calls", calls)):
+            totals[key] += n
+        print(
+            f"[DRY] {namespace}: {len(texts)} records, {len(plan.embed)} to embed, {len(plan.update)} metadata-only, "
+            f"{len(plan.delete)} to delete, {len(plan.unchanged)} unchanged, ~{calls} embed calls"
+        )
+    print(
+        f"Dry run: {len(jobs)} namespaces, {totals['records']} records, {totals['embed']} to embed "
+        f"(~{totals['calls']} embed calls of up to {EMBEDDING_BATCH_SIZE}), {totals['update']} metadata-only, {totals['delete']} to delete"
+    )
+
+
+def run(jobs, workers: int, full: bool) -> None:
+    index_name = os.getenv("PINECONE_INDEX", "ycrag-travel")
+    region = os.getenv("PINECONE_REGION", "us-east-1")
+    cloud = os.getenv("PINECONE_CLOUD", "aws")
+    api_key = os.getenv("PINECONE_API_KEY")
+    if not api_key:
+        raise SystemExit("PINECONE_API_KEY missing")
+
+    from pinecone import Pinecone
+    embeddings = get_embeddings()
+    pc = Pinecone(api_key=api_key)
+    if not pc.has_index(index_name):
+        sample_vec = embeddings.embed_documents(jobs[0][2][:1])[0]
+        ensure_index(pc, index_name, len(sample_vec), cloud, region)
+    index = pc.Index(index_name)
+
+    totals: Dict[str, int] = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed") as embed_pool, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upsert") as write_pool:
+
+        def stage(city: str, category: str, texts: List[str], metas: List[Dict[str, Any]]) -> Future:
+            prepared = prepare_sync(embeddings, namespace_for(city, category), f"{city}-{category}", texts, metas, full=full)
+            return write_pool.submit(apply_sync, index, prepared)
+
+        staged = [(namespace_for(job[0], job[1]), embed_pool.submit(stage, *job)) for job in jobs]
+        for namespace, fut in staged:
+            try:
+                stats = fut.result().result()
+            except Exception as e:
+                print(f"[FAIL] {namespace}: {e}")
+                totals["errors"] = totals.get("errors", 0) + 1
+                continue
+            for key, n in stats.items():
+                totals[key] = totals.get(key, 0) + n
+            print(
+                f"[OK] {namespace}: {stats['embedded']} embedded, {stats['updated']} metadata-only, "
+                f"{stats['deleted']} deleted, {stats['unchanged']} unchanged, {stats['failed']} failed"
+            )
+
+    print(
+        f"Done. {len(jobs)} namespaces: {totals.get('embedded', 0)} embedded, {totals.get('updated', 0)} metadata-only, "
+        f"{totals.get('deleted', 0)} deleted, {totals.get('errors', 0)} errors"
+    )
+    stats = embeddings.document_stats()
+    print(f"[EMBED] {stats['texts']} texts in {stats['batches']} batches, {stats['texts_per_s']} texts/s, {stats['retries']} retries, {stats['failed']} failed")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m create_memory", description="Index city datasets into Pinecone.")
+    parser.add_argument("--city", action="append", help="city under data/ (repeatable; default: all)")
+    parser.add_argument("--category", action="append", choices=sorted(CATEGORY_NAMESPACES), help="category (repeatable; default: all)")
+    parser.add_argument("--workers", type=int, default=INDEX_WORKERS, help="namespaces embedded/upserted concurrently")
+    parser.add_argument("--full", action="store_true", help="re-embed every record instead of only changed ones")
+    parser.add_argument("--dry-run", action="store_true", help="report record counts and estimated embedding calls; touch nothing")
+    args = parser.parse_args(argv)
+
+    cities = [c.lower() for c in args.city] if args.city else discover_cities()
+    unknown = [c for c in cities if c not in list_data_cities()]
+    if unknown:
+        raise SystemExit(f"Unknown city: {', '.join(unknown)}")
+    jobs = _jobs(cities, args.category or list(CATEGORY_NAMESPACES))
+    if not jobs:
+        raise SystemExit("No records found across categories.")
+    if args.dry_run:
+        dry_run(jobs, args.full)
+    else:
+        run(jobs, max(1, args.workers), args.full)
+
+
+if __name__ == "__main__":
+    main()
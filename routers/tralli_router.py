@@ -428,37 +428,282 @@
 
 #     return {"category": category, **result}
 
-from fastapi import APIRouter, HTTPException
-from fastapi.concurrency import run_in_threadpool
+import asyncio
+import os
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from service.query_classifier import classify_query_with_gemini
-from service.async_utils import run_blocking
-from service.city_normalizer import normalize_city
-from agents.tralli_agent import get_city_handlers
-from typing import Dict, Any
+from service.centroid_router import aroute_query
+from service.embeddings import get_embeddings
+from service.fanout import achoose_categories, afanout
+from service.geo_index import GEO_CATEGORIES, get_geo_index
+from service.city_normalizer import SUPPORTED_CITIES, anormalize_city
+from agents.tralli_agent import BOT_REGISTRY, get_city_handlers
+from service.responses import FragmentJSONResponse, render_json
+from service.response_cache import STALE, get_response_cache
+from service.singleflight import single_flight
+from service.text_utils import normalize_text
+from service import metrics
+from typing import Dict, Any, List, Optional, Tuple
+
+# Upper bound on items per /tralli/query/batch request
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "32"))
 
 router = APIRouter()
+_responses = get_response_cache()
+# Identical concurrent queries share one classify/embed/search pipeline
+_inflight = single_flight("query_singleflight")
 
 class CityQueryInput(BaseModel):
     city: str
     query: str
+    # Search several category namespaces and merge by score
+    categories: Optional[List[str]] = None
+    fanout: bool = False
 
-@router.post("/tralli/query")
-async def classify_and_handle_query(input: CityQueryInput) -> Dict[str, Any]:
-    # Normalize city name (LLM + fuzzy, constrained to supported whitelist)
-    city = await run_blocking(normalize_city, input.city)
-    handlers = get_city_handlers(city)
-    if not handlers:
+def _require_city(city: str) -> None:
+    # The normalizer passes unresolved names through; don't let them reach the indexes
+    if city not in SUPPORTED_CITIES or not get_city_handlers(city):
         raise HTTPException(status_code=400, detail=f"City '{city}' not supported.")
 
-    # Run blocking classification in threadpool
-    category = await run_blocking(classify_query_with_gemini, input.query)
-    handler = handlers.get(category, handlers.get("miscellaneous"))
-
-    # Run the synchronous bot logic in threadpool to avoid blocking event loop
-    payload = await run_blocking(handler, input.query)
+async def _classify(city: str, query: str) -> Tuple[str, List[float]]:
+    """Route a query and return (category, query vector)."""
+    # Start the query embedding now: it does not depend on the category, so it
+    # overlaps classification and the chosen bot receives a ready vector
+    qvec_task = asyncio.ensure_future(get_embeddings().aembed_query(query))
+    try:
+        # Route by nearest category centroid; Gemini only when the margin is too small
+        category = await aroute_query(city, query, qvec_task)
+        qvec = await qvec_task
+    except BaseException:
+        qvec_task.cancel()
+        raise
+    return category, qvec
+
+async def _answer(city: str, query: str) -> Dict[str, Any]:
+    category, qvec = await _classify(city, query)
+    # Bots await Gemini/Pinecone natively; only legacy paths fall back to a worker thread
+    payload = await get_city_handlers(city).ahandle(category, query, qvec=qvec or None)
     if isinstance(payload, str):
         payload = {"results": []}
     # Always exclude any 'text' field per requirement
     results = payload.get("results", [])
-    return {"category": category, "results": results}
\ No newline at end of file
+    return {"category": category, "results": results}
+
+def _requested_categories(input: CityQueryInput) -> Optional[List[str]]:
+    """Trimmed, de-duplicated `categories`; 400 when any is not a known category."""
+    if not input.categories:
+        return None
+    requested = list(dict.fromkeys(c.strip().lower() for c in input.categories))
+    unknown = [c for c in requested if c not in BOT_REGISTRY]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unsupported categories {unknown}; choose from {list(BOT_REGISTRY)}.")
+    return requested
+
+async def _answer_fanout(city: str, query: str, requested: Optional[List[str]], qvec: Optional[List[float]] = None) -> Dict[str, Any]:
+    if qvec is None:
+        qvec = await get_embeddings().aembed_query(query)
+    categories = await achoose_categories(city, qvec, requested)
+    merged = await afanout(city, qvec, categories)
+    return {
+        "category": merged[0]["category"] if merged else (categories[0] if categories else "misc"),
+        "categories": categories,
+        "results": [m["metadata"] for m in merged],
+        "matches": [{"category": m["category"], "score": m["score"]} for m in merged],
+    }
+
+def _cacheable(body: Dict[str, Any]) -> bool:
+    # Empty answers are usually upstream failures; let the next request retry
+    return bool(body.get("results"))
+
+@router.post("/tralli/query", response_class=FragmentJSONResponse)
+async def classify_and_handle_query(input: CityQueryInput) -> FragmentJSONResponse:
+    # Normalize city name (alias table + fuzzy, LLM only for unknown spellings)
+    city = await anormalize_city(input.city)
+    _require_city(city)
+
+    requested = _requested_categories(input)
+    fanout = input.fanout or bool(requested)
+    if fanout:
+        key = _responses.key(city, input.query) + "|fanout:" + ",".join(requested or [])
+        compute = lambda: _answer_fanout(city, input.query, requested)
+    else:
+        key = _responses.key(city, input.query)
+        compute = lambda: _answer(city, input.query)
+    body, status = _responses.get(key)
+    if body is None:
+        body = await _inflight.do(key, compute)
+        if _cacheable(body):
+            _responses.put(key, body)
+    elif status == STALE:
+        # Serve the expired copy now, recompute it behind the response
+        _responses.refresh(key, lambda: _inflight.do(key, compute), _cacheable)
+    # Returned as a response object so records are spliced as pre-encoded JSON
+    return FragmentJSONResponse(body, headers={"X-Cache": status})
+
+def _sse(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + render_json(data) + b"\n\n"
+
+def _ndjson(event: str, data: Any) -> bytes:
+    return render_json({"event": event, "data": data}) + b"\n"
+
+@router.post("/tralli/query/stream")
+async def classify_and_handle_query_stream(input: CityQueryInput, request: Request, format: Optional[str] = None):
+    """Staged variant of /tralli/query: city, category, then one event per result.
+
+    Fan-out requests (`categories`/`fanout`) send the chosen categories with the
+    category event and stream the merged results.
+
+    Server-Sent Events when the client sends `Accept: text/event-stream` or
+    `?format=sse`; newline-delimited JSON otherwise.
+    """
+    sse = format == "sse" or (format is None and "text/event-stream" in request.headers.get("accept", ""))
+    encode = _sse if sse else _ndjson
+    requested = _requested_categories(input)
+    fanout = input.fanout or bool(requested)
+
+    async def events():
+        try:
+            city = await anormalize_city(input.city)
+            _require_city(city)
+            yield encode("city", {"city": city})
+            if fanout:
+                body = await _answer_fanout(city, input.query, requested)
+                yield encode("category", {"category": body["category"], "categories": body["categories"]})
+                results = body["results"]
+            else:
+                category, qvec = await _classify(city, input.query)
+                yield encode("category", {"category": category})
+                payload = await get_city_handlers(city).ahandle(category, input.query, qvec=qvec or None)
+                results = payload.get("results", []) if isinstance(payload, dict) else []
+            for record in results:
+                yield encode("result", record)
+            yield encode("done", {"count": len(results)})
+        except HTTPException as e:
+            yield encode("error", {"detail": e.detail})
+        except Exception as e:
+            print("Stream query error:", e)
+            yield encode("error", {"detail": str(e) or type(e).__name__})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _ready(vec: List[float]) -> "asyncio.Future[List[float]]":
+    # aroute_query takes an awaitable vector; it may never await it in gemini mode
+    fut = asyncio.get_running_loop().create_future()
+    fut.set_result(vec)
+    return fut
+
+@router.post("/tralli/query/batch", response_class=FragmentJSONResponse)
+async def classify_and_handle_batch(inputs: List[CityQueryInput]) -> FragmentJSONResponse:
+    """Answer several (city, query) pairs in one round trip.
+
+    Queries are embedded in one batched upstream call and routed concurrently;
+    items with `categories`/`fanout` are answered by fan-out instead (unknown
+    categories reject the whole batch with 400). Routed items are then grouped by (city, category): each group runs on one bot, and
+    items in it sharing a normalized query are searched once. Results come back
+    in input order; a failing item carries an "error" instead of failing the
+    whole batch.
+    """
+    if len(inputs) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"At most {BATCH_MAX_ITEMS} queries per batch.")
+    if not inputs:
+        return FragmentJSONResponse({"items": []})
+    requested = [_requested_categories(i) for i in inputs]
+
+    raw_cities = list(dict.fromkeys(i.city for i in inputs))
+    resolved = dict(zip(raw_cities, await asyncio.gather(*(anormalize_city(c) for c in raw_cities))))
+    cities = [resolved[i.city] for i in inputs]
+
+    items: List[Dict[str, Any]] = [{} for _ in inputs]
+    valid: List[int] = []
+    for n, city in enumerate(cities):
+        try:
+            _require_city(city)
+            valid.append(n)
+        except HTTPException as e:
+            items[n] = {"city": city, "error": e.detail}
+    if not valid:
+        return FragmentJSONResponse({"items": items})
+
+    qvecs: List[List[float]] = [[] for _ in inputs]
+    for n, vec in zip(valid, await get_embeddings().aembed_queries([inputs[n].query for n in valid])):
+        qvecs[n] = vec
+    # Fan-out items skip routing and are answered like /tralli/query fan-out
+    fanned = [n for n in valid if inputs[n].fanout or requested[n]]
+    routed = [n for n in valid if not (inputs[n].fanout or requested[n])]
+    fanout_task = asyncio.gather(
+        *(_answer_fanout(cities[n], inputs[n].query, requested[n], qvecs[n]) for n in fanned),
+        return_exceptions=True,
+    )
+    categories = await asyncio.gather(
+        *(aroute_query(cities[n], inputs[n].query, _ready(qvecs[n])) for n in routed),
+        return_exceptions=True,
+    )
+
+    # (city, category) -> normalized query -> item positions
+    groups: Dict[Tuple[str, str], Dict[str, List[int]]] = {}
+    for n, category in zip(routed, categories):
+        if isinstance(category, BaseException):
+            items[n] = {"city": cities[n], "error": f"classification failed: {category}"}
+            continue
+        groups.setdefault((cities[n], category), {}).setdefault(normalize_text(inputs[n].query), []).append(n)
+
+    async def run_group(city: str, category: str, queries: Dict[str, List[int]]) -> List[Any]:
+        handlers = get_city_handlers(city)
+        return await asyncio.gather(
+            *(handlers.ahandle(category, inputs[m[0]].query, qvec=qvecs[m[0]] or None) for m in queries.values()),
+            return_exceptions=True,
+        )
+
+    keys = list(groups)
+    outcomes = await asyncio.gather(*(run_group(*k, groups[k]) for k in keys), return_exceptions=True)
+
+    for (city, category), outcome in zip(keys, outcomes):
+        queries = list(groups[(city, category)].values())
+        payloads = outcome if isinstance(outcome, list) else [outcome] * len(queries)
+        for members, payload in zip(queries, payloads):
+            for n in members:
+                if isinstance(payload, BaseException):
+                    items[n] = {"city": city, "category": category, "error": str(payload) or type(payload).__name__}
+                else:
+                    results = payload.get("results", []) if isinstance(payload, dict) else []
+                    items[n] = {"city": city, "category": category, "results": results}
+    for n, body in zip(fanned, await fanout_task):
+        if isinstance(body, BaseException):
+            items[n] = {"city": cities[n], "error": str(body) or type(body).__name__}
+        else:
+            items[n] = {"city": cities[n], **body}
+    return FragmentJSONResponse({"items": items})
+
+@router.get("/tralli/nearby", response_class=FragmentJSONResponse)
+async def nearby_places(
+    city: str,
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(1.0, gt=0, le=200),
+    category: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=200),
+) -> FragmentJSONResponse:
+    """POIs within radius_km of (lat, lon), nearest first; category is a comma-separated list."""
+    city = await anormalize_city(city)
+    _require_city(city)
+    categories = [c.strip().lower() for c in category.split(",") if c.strip()] if category else None
+    if categories:
+        unknown = [c for c in categories if c not in GEO_CATEGORIES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unsupported categories {unknown}; choose from {list(GEO_CATEGORIES)}.")
+    hits = get_geo_index(city).nearby(lat, lon, radius_km, categories, limit)
+    return FragmentJSONResponse({
+        "city": city,
+        "results": [h["record"] for h in hits],
+        "matches": [{"category": h["category"], "distanceKm": h["distanceKm"]} for h in hits],
+    })
+
+@router.get("/tralli/metrics")
+async def tralli_metrics() -> Dict[str, Any]:
+    # Cache and routing counters for capacity sizing
+    return metrics.snapshot()
@@ -0,0 +1,61 @@
+"""Okapi BM25 over one city/category's records, for hybrid retrieval.
+
+The corpus is the same data/<city>/ records the vectors were built from, so a
+BM25 hit carries the same metadata (and `_id`) as the matching vector.
+"""
+from __future__ import annotations
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+import math
+
+from service.city_data import load_records
+from service.text_builders import search_text
+from service.text_utils import normalize_text
+
+_STOPWORDS = frozenset(
+    "a an and are at best by for from give good how i in is it me near of on or show some the to top what where which with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in normalize_text(text, strip_punct=True).split() if t not in _STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, docs: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        lengths: List[int] = []
+        for i, doc in enumerate(docs):
+            tokens = tokenize(doc)
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                self._postings[term].append((i, tf))
+        n = len(docs)
+        avg = (sum(lengths) / n) if n else 0.0
+        # Per-document length normalization, precomputed once
+        self._norm = [k1 * (1 - b + b * (l / avg if avg else 0.0)) for l in lengths]
+        self._idf = {t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for t, p in self._postings.items()}
+
+    def search(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self._postings[term]:
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + self._norm[i])
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        return ranked[:top_k]
+
+
+@lru_cache(maxsize=128)
+def get_bm25(city: str, category: str) -> Tuple[BM25Index, List[Dict[str, Any]]]:
+    """(index, records) for one city/category; the index's doc i is records[i]."""
+    records = load_records(city, category)
+    return BM25Index([search_text(category, r) for r in records]), records
+
+
+__all__ = ["BM25Index", "get_bm25", "tokenize"]
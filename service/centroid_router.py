@@ -0,0 +1,189 @@
+"""Embedding-based query routing by nearest category centroid.
+
+Each city's category namespaces (Food-Varanasi, Place-Varanasi, ...) are summarized
+by the normalized mean of their indexed vectors, optionally plus a few medoids.
+A query is routed to the category whose representatives are most similar to its
+embedding; when the top-2 margin is below ROUTER_MARGIN the decision is deferred
+to classify_query_with_gemini.
+
+Only namespaces already in the local vector cache are used: routing never
+exports from Pinecone inside a request, and a city without cached vectors is
+classified by Gemini. The app builds every city's centroids at startup.
+
+QUERY_ROUTER=centroid (default) enables it; QUERY_ROUTER=gemini restores LLM-only routing.
+"""
+from __future__ import annotations
+from threading import Lock
+from typing import Awaitable, Dict, List, Optional, Sequence, Tuple
+import os
+import numpy as np
+
+from service.city_data import CATEGORY_NAMESPACES, namespace_for
+from service.embeddings import get_embeddings
+from service.local_index import get_local_index
+from service.query_classifier import aclassify_query_with_gemini, classify_query_with_gemini
+from service.async_utils import run_blocking
+from service import metrics
+
+QUERY_ROUTER = os.getenv("QUERY_ROUTER", "centroid").strip().lower()
+ROUTER_MARGIN = float(os.getenv("ROUTER_MARGIN", "0.05"))
+ROUTER_MEDOIDS = int(os.getenv("ROUTER_MEDOIDS", "0"))
+
+
+def _medoids(matrix: np.ndarray, k: int) -> np.ndarray:
+    """Greedy farthest-point selection of k actual rows (cheap stand-in for k-medoids)."""
+    if k <= 0 or matrix.shape[0] == 0:
+        return matrix[:0]
+    chosen = [int(np.argmax(matrix @ matrix.mean(axis=0)))]
+    best = matrix @ matrix[chosen[0]]
+    while len(chosen) < min(k, matrix.shape[0]):
+        nxt = int(np.argmin(best))
+        chosen.append(nxt)
+        best = np.maximum(best, matrix @ matrix[nxt])
+    return matrix[chosen]
+
+
+class CentroidRouter:
+    def __init__(self, margin: float = ROUTER_MARGIN, medoids: int = ROUTER_MEDOIDS):
+        self.margin = margin
+        self.medoids = medoids
+        # city -> (category labels per representative row, representative matrix)
+        self._cities: Dict[str, Tuple[List[str], np.ndarray]] = {}
+        self._lock = Lock()
+
+    def _build(self, city: str) -> Tuple[List[str], np.ndarray]:
+        index = get_local_index()
+        labels: List[str] = []
+        reps: List[np.ndarray] = []
+        for category in CATEGORY_NAMESPACES:
+            namespace = namespace_for(city, category)
+            if not index.has_vectors(namespace):
+                continue
+            matrix = index.namespace(namespace).matrix
+            if matrix.shape[0] == 0:
+                continue
+            centroid = matrix.mean(axis=0)
+            centroid /= np.linalg.norm(centroid) + 1e-8
+            rows = [centroid[None, :], _medoids(matrix, self.medoids)]
+            for block in rows:
+                labels.extend([category] * block.shape[0])
+                reps.append(block)
+        if not reps:
+            return [], np.zeros((0, 0), dtype=np.float32)
+        return labels, np.ascontiguousarray(np.vstack(reps), dtype=np.float32)
+
+    def representatives(self, city: str) -> Tuple[List[str], np.ndarray]:
+        reps = self._cities.get(city)
+        if reps is None:
+            with self._lock:
+                reps = self._cities.get(city)
+                if reps is None:
+                    reps = self._build(city)
+                    if reps[0]:
+                        self._cities[city] = reps
+        return reps
+
+    def is_built(self, city: str) -> bool:
+        return city in self._cities
+
+    def scores(self, city: str, qvec: Sequence[float]) -> Dict[str, float]:
+        """Best similarity per category for a query vector; empty when the city has no vectors."""
+        labels, reps = self.representatives(city)
+        if not labels or not len(qvec) or len(qvec) != reps.shape[1]:
+            return {}
+        q = np.asarray(qvec, dtype=np.float32)
+        sims = reps @ (q / (np.linalg.norm(q) + 1e-8))
+        out: Dict[str, float] = {}
+        for label, s in zip(labels, sims.tolist()):
+            if s > out.get(label, -2.0):
+                out[label] = s
+        return out
+
+    def classify(self, city: str, qvec: Sequence[float]) -> Optional[str]:
+        """Return the nearest category, or None when the top-2 margin is too small to trust."""
+        ranked = sorted(self.scores(city, qvec).items(), key=lambda kv: kv[1], reverse=True)
+        if not ranked:
+            return None
+        if len(ranked) > 1 and ranked[0][1] - ranked[1][1] < self.margin:
+            return None
+        return ranked[0][0]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._cities.clear()
+
+
+_router = CentroidRouter()
+_stats = {"centroid": 0, "gemini_fallback": 0, "gemini": 0}
+_stats_lock = Lock()
+
+
+def _count(key: str) -> None:
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def _stats_snapshot():
+    with _stats_lock:
+        return {**_stats, "mode": QUERY_ROUTER, "margin": ROUTER_MARGIN}
+
+
+metrics.register("query_router", _stats_snapshot)
+
+
+def get_centroid_router() -> CentroidRouter:
+    return _router
+
+
+def build_centroids(cities: Sequence[str]) -> None:
+    """Build the centroids of each city up front (app startup) so no request pays for loading them."""
+    if QUERY_ROUTER != "centroid":
+        return
+    for city in cities:
+        try:
+            _router.representatives(city)
+        except Exception as e:
+            print(f"Centroid build error ({city}):", e)
+
+
+def route_query(city: str, query: str, qvec: Optional[Sequence[float]] = None) -> str:
+    """Pick the category for a query: centroid routing first, Gemini when uncertain."""
+    if QUERY_ROUTER != "centroid":
+        _count("gemini")
+        return classify_query_with_gemini(query)
+    if qvec is None:
+        # Cached by the embedding layer, so the bot's own embed_query is a memory hit
+        qvec = get_embeddings().embed_query(query)
+    category = _router.classify(city, qvec) if qvec else None
+    if category is not None:
+        _count("centroid")
+        return category
+    _count("gemini_fallback")
+    return classify_query_with_gemini(query)
+
+
+async def aroute_query(city: str, query: str, qvec: Awaitable[List[float]]) -> str:
+    """Async routing against an in-flight query embedding.
+
+    In gemini mode the LLM call overlaps the embedding; in centroid mode the
+    vector is awaited first and Gemini only runs on a low-margin fallback.
+    """
+    if QUERY_ROUTER != "centroid":
+        _count("gemini")
+        return await aclassify_query_with_gemini(query)
+    vec = await qvec
+    category = None
+    if vec:
+        if _router.is_built(city):
+            # A (k x 768) matmul; cheaper inline than a thread hop
+            category = _router.classify(city, vec)
+        else:
+            # First query for the city loads its namespaces from disk
+            category = await run_blocking(_router.classify, city, vec)
+    if category is not None:
+        _count("centroid")
+        return category
+    _count("gemini_fallback")
+    return await aclassify_query_with_gemini(query)
+
+__all__ = ["CentroidRouter", "get_centroid_router", "build_centroids", "route_query", "aroute_query", "QUERY_ROUTER"]
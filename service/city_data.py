@@ -0,0 +1,120 @@
+from __future__ import annotations
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+
+from service.metadata_order import OrderedRecord, canonical_record
+
+DATA_ROOT = Path(__file__).resolve().parents[1] / "data"
+
+# Router category -> namespace prefix used by the bots and the indexers
+CATEGORY_NAMESPACES: Dict[str, str] = {
+    "place": "Place",
+    "food": "Food",
+    "shop": "Shop",
+    "transport": "Transport",
+    "accommodation": "Accommodation",
+    "activity": "Activity",
+    "hiddengem": "HiddenGem",
+    "itinerary": "Itinerary",
+    "nearbyspot": "NearbySpot",
+    "cityinfo": "CityInfo",
+    "connectivity": "Connectivity",
+    "misc": "Misc",
+}
+
+_PREFIX_TO_CATEGORY: Dict[str, str] = {v.lower(): k for k, v in CATEGORY_NAMESPACES.items()}
+
+
+def namespace_for(city: str, category: str) -> str:
+    """Return the vector namespace for a city/category, e.g. ('varanasi', 'food') -> 'Food-Varanasi'."""
+    return f"{CATEGORY_NAMESPACES[category]}-{city.lower().title()}"
+
+
+def parse_namespace(namespace: str) -> Optional[Tuple[str, str]]:
+    """Inverse of namespace_for: 'HiddenGem-Agra' -> ('agra', 'hiddengem')."""
+    prefix, _, city = namespace.partition("-")
+    category = _PREFIX_TO_CATEGORY.get(prefix.lower())
+    if not category or not city:
+        return None
+    return city.lower(), category
+
+
+def category_file(city: str, category: str) -> Optional[Path]:
+    """Locate data/<city>/<Category>_<city>.json; file casing differs between cities."""
+    city_dir = DATA_ROOT / city.lower()
+    if not city_dir.is_dir():
+        return None
+    wanted = f"{category}_{city.lower()}.json"
+    for path in city_dir.iterdir():
+        if path.name.lower() == wanted:
+            return path
+    return None
+
+
+def sanitize(meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop None values the same way the indexers do before upserting metadata."""
+    out: Dict[str, Any] = {}
+    for k, v in meta.items():
+        if v is None:
+            continue
+        if isinstance(v, list):
+            out[k] = [x for x in v if x is not None]
+        else:
+            out[k] = v
+    return out
+
+
+@lru_cache(maxsize=128)
+def load_records(city: str, category: str) -> List[Dict[str, Any]]:
+    """Load the record list for one city/category. Cached; callers must not mutate the result."""
+    path = category_file(city, category)
+    if path is None:
+        return []
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"City data load error ({path}):", e)
+        return []
+    section = data.get(category) if isinstance(data, dict) else None
+    if not isinstance(section, list):
+        return []
+    return [sanitize(r) for r in section if isinstance(r, dict)]
+
+
+@lru_cache(maxsize=128)
+def load_canonical(city: str, category: str) -> List[OrderedRecord]:
+    """load_records in canonical key order, tagged with the category's content type; same positions."""
+    return [canonical_record(r, category) for r in load_records(city, category)]
+
+
+def data_version(city: str) -> str:
+    """Short fingerprint of data/<city>/ (file names, sizes, mtimes); changes when any file is rewritten."""
+    city_dir = DATA_ROOT / city.lower()
+    if not city_dir.is_dir():
+        return "-"
+    parts = []
+    for path in sorted(city_dir.iterdir()):
+        st = path.stat()
+        parts.append(f"{path.name}:{st.st_size}:{st.st_mtime_ns}")
+    return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def list_data_cities() -> List[str]:
+    return sorted(p.name for p in DATA_ROOT.iterdir() if p.is_dir()) if DATA_ROOT.is_dir() else []
+
+
+__all__ = [
+    "CATEGORY_NAMESPACES",
+    "namespace_for",
+    "parse_namespace",
+    "category_file",
+    "sanitize",
+    "load_records",
+    "load_canonical",
+    "data_version",
+    "list_data_cities",
+]
@@ -1,8 +1,15 @@
 from __future__ import annotations
-from typing import List, Optional
+from functools import lru_cache
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
 import os
+import re
 from dotenv import load_dotenv
 import google.generativeai as genai
+from service.city_data import load_records
+from service.fuzzy import BKTree
+from service.text_utils import normalize_text
+from service import metrics
 
 # Whitelist of supported cities in this project
 SUPPORTED_CITIES: List[str] = [
@@ -14,6 +21,16 @@ SUPPORTED_CITIES: List[str] = [
     "ayodhya",
 ]
 
+# Curated spellings/historic names on top of each city's Cityinfo alternateNames
+CITY_ALIASES: Dict[str, List[str]] = {
+    "varanasi": ["banaras", "benaras", "benares", "banares", "kashi", "kasi", "varansi", "varnasi"],
+    "kolkata": ["calcutta", "kolkatta", "kalkata", "culcutta"],
+    "rishikesh": ["hrishikesh", "rishikes", "rushikesh"],
+    "agra": ["akbarabad", "agra city"],
+    "ayodhya": ["ayodhya dham", "saket", "awadh", "avadh", "ajodhya", "ayodya"],
+    "mahabaleshwar": ["mahabaleswar", "mahableshwar", "mahabaleshvar", "mahabaleshwer"],
+}
+
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if GEMINI_API_KEY:
@@ -55,37 +72,164 @@ def _fuzzy(candidate: str, options: List[str]) -> Optional[str]:
     return best if best_score >= 2.5 else None
 
 
+_ALIAS_SPLIT_RE = re.compile(r",|/|\(|\)|\band\b|\bor\b")
+
+
+@lru_cache(maxsize=1)
+def _alias_index() -> Tuple[Dict[str, Optional[str]], BKTree]:
+    """alias -> city (None when an alias is shared by two cities) plus a BK-tree over all aliases."""
+    aliases: Dict[str, Optional[str]] = {}
+
+    def add(alias: str, city: str) -> None:
+        a = normalize_text(alias, strip_punct=True)
+        if not a:
+            return
+        if aliases.get(a, city) != city:
+            aliases[a] = None  # ambiguous; leave it to the LLM
+        else:
+            aliases[a] = city
+
+    for city in SUPPORTED_CITIES:
+        add(city, city)
+        for alias in CITY_ALIASES.get(city, []):
+            add(alias, city)
+        for rec in load_records(city, "cityinfo"):
+            for name in rec.get("alternateNames") or []:
+                if isinstance(name, str):
+                    for part in _ALIAS_SPLIT_RE.split(name):
+                        add(part, city)
+    return aliases, BKTree(a for a, c in aliases.items() if c)
+
+
+def _max_edits(text: str) -> int:
+    return 1 if len(text) <= 5 else 2 if len(text) <= 10 else 3
+
+
+@lru_cache(maxsize=1024)
+def _local_lookup(candidate: str) -> Tuple[Optional[str], str]:
+    """Resolve via alias table, per-token alias match, then bounded edit distance."""
+    aliases, tree = _alias_index()
+    c = normalize_text(candidate, strip_punct=True)
+    if not c:
+        return None, "unresolved"
+    city = aliases.get(c)
+    if city:
+        return city, "alias"
+    # "Varanasi, UP" / "trip to kashi" -> any token that is itself an alias
+    token_hits = {aliases.get(t) for t in c.split()} - {None}
+    if len(token_hits) == 1:
+        return token_hits.pop(), "alias"
+    hits = tree.search(c, _max_edits(c))
+    if hits:
+        best = hits[0][0]
+        cities = {aliases[a] for d, a in hits if d == best}
+        if len(cities) == 1:
+            return cities.pop(), "edit_distance"
+    return None, "unresolved"
+
+
+_path_counts: Dict[str, int] = {}
+_path_lock = Lock()
+
+
+def _count_path(path: str) -> None:
+    with _path_lock:
+        _path_counts[path] = _path_counts.get(path, 0) + 1
+
+
+def _path_snapshot() -> Dict[str, int]:
+    with _path_lock:
+        return dict(_path_counts)
+
+
+metrics.register("city_normalizer", _path_snapshot)
+
+
 def normalize_city(city: str) -> str:
-    """Return a supported city name. Try LLM correction, then fuzzy fallback. Defaults to input lowercased.
+    """Return a supported city name. Try local aliases/edit distance, then LLM, then fuzzy. Defaults to input lowercased.
 
     Never returns a city outside SUPPORTED_CITIES.
     """
+    return resolve_city(city)[0]
+
+
+def resolve_city(city: str) -> Tuple[str, str]:
+    """Normalize a city and report which path resolved it.
+
+    Paths, cheapest first: exact, alias, edit_distance, llm, fuzzy, unresolved.
+    """
+    result = _resolve_local(city)
+    if result is None:
+        result = _resolve_remote(city, _llm_correct(city))
+    _count_path(result[1])
+    return result
+
+
+async def aresolve_city(city: str) -> Tuple[str, str]:
+    """Async twin of resolve_city; only the LLM fallback awaits upstream."""
+    result = _resolve_local(city)
+    if result is None:
+        result = _resolve_remote(city, await _allm_correct(city))
+    _count_path(result[1])
+    return result
+
+
+async def anormalize_city(city: str) -> str:
+    return (await aresolve_city(city))[0]
+
+
+def _resolve_local(city: str) -> Optional[Tuple[str, str]]:
     if not city:
-        return city
+        return city, "unresolved"
     c = city.strip().lower()
     if c in SUPPORTED_CITIES:
-        return c
+        return c, "exact"
+    local, path = _local_lookup(c)
+    if local:
+        return local, path
+    return None
 
-    # Try LLM suggestion constrained to whitelist
-    if _model is not None:
-        try:
-            opts = ", ".join(SUPPORTED_CITIES)
-            prompt = f"""
+
+def _resolve_remote(city: str, llm_answer: Optional[str]) -> Tuple[str, str]:
+    if llm_answer in SUPPORTED_CITIES:
+        return llm_answer, "llm"
+    # Fuzzy fallback (no external deps)
+    c = city.strip().lower()
+    guess = _fuzzy(c, SUPPORTED_CITIES)
+    return (guess, "fuzzy") if guess else (c, "unresolved")
+
+
+def _llm_prompt(city: str) -> str:
+    opts = ", ".join(SUPPORTED_CITIES)
+    return f"""
 You correct misspelled Indian city names. Pick the single closest match from this whitelist: {opts}.
 Input: {city}
 Rules: respond with only the exact city string from the whitelist in lowercase. If none is close, respond with 'unknown'.
 """
-            resp = _model.generate_content(prompt)
-            ans = (resp.text or "").strip().lower()
-            if ans in SUPPORTED_CITIES:
-                return ans
-        except Exception as e:
-            # Fall through to fuzzy
-            print("City normalizer LLM error:", e)
 
-    # Fuzzy fallback (no external deps)
-    guess = _fuzzy(c, SUPPORTED_CITIES)
-    return guess or c
+
+def _llm_correct(city: str) -> Optional[str]:
+    # Try LLM suggestion constrained to whitelist
+    if _model is None:
+        return None
+    try:
+        resp = _model.generate_content(_llm_prompt(city))
+        return (resp.text or "").strip().lower()
+    except Exception as e:
+        # Fall through to fuzzy
+        print("City normalizer LLM error:", e)
+        return None
+
+
+async def _allm_correct(city: str) -> Optional[str]:
+    if _model is None:
+        return None
+    try:
+        resp = await _model.generate_content_async(_llm_prompt(city))
+        return (resp.text or "").strip().lower()
+    except Exception as e:
+        print("City normalizer LLM error:", e)
+        return None
 
 
-__all__ = ["normalize_city", "list_supported_cities"]
+__all__ = ["normalize_city", "resolve_city", "anormalize_city", "aresolve_city", "list_supported_cities"]
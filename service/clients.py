@@ -0,0 +1,60 @@
+"""Process-wide upstream clients shared by every bot and city.
+
+Bots used to build their own Pinecone/Groq clients (12 bots x N cities); these
+singletons keep one index handle with a sized connection pool and one Groq client.
+"""
+from __future__ import annotations
+from functools import lru_cache
+from typing import Any, Optional
+import os
+from dotenv import load_dotenv
+from groq import Groq
+from pinecone import Pinecone
+
+from service.local_index import get_local_index, use_local_index
+
+load_dotenv()
+
+PINECONE_INDEX = os.getenv("PINECONE_INDEX", "ycrag-travel")
+# Optional data-plane host; skips the describe_index round trip at startup
+PINECONE_HOST = os.getenv("PINECONE_HOST", "")
+PINECONE_POOL_THREADS = int(os.getenv("PINECONE_POOL_THREADS", "4"))
+PINECONE_POOL_MAXSIZE = int(os.getenv("PINECONE_POOL_MAXSIZE", "32"))
+
+
+@lru_cache(maxsize=1)
+def get_pinecone_index() -> Optional[Any]:
+    api_key = os.getenv("PINECONE_API_KEY")
+    if not api_key:
+        return None
+    try:
+        pc = Pinecone(api_key=api_key, pool_threads=PINECONE_POOL_THREADS)
+        return pc.Index(
+            name="" if PINECONE_HOST else PINECONE_INDEX,
+            host=PINECONE_HOST,
+            pool_threads=PINECONE_POOL_THREADS,
+            connection_pool_maxsize=PINECONE_POOL_MAXSIZE,
+        )
+    except Exception as e:
+        print("Pinecone init error:", e)
+        return None
+
+
+@lru_cache(maxsize=1)
+def get_groq_client() -> Optional[Groq]:
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        return None
+    try:
+        return Groq(api_key=api_key)
+    except Exception as e:
+        print("Groq init error:", e)
+        return None
+
+
+def get_vector_index() -> Optional[Any]:
+    """The index bots query: the in-process LocalVectorIndex or the shared Pinecone handle."""
+    return get_local_index() if use_local_index() else get_pinecone_index()
+
+
+__all__ = ["get_pinecone_index", "get_groq_client", "get_vector_index"]
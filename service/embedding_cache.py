@@ -0,0 +1,166 @@
+"""Two-tier cache for query embeddings: bounded in-memory LRU over a persistent SQLite store.
+
+Keys are namespaced by embedding model, output dim and projection seed, so changing
+GOOGLE_EMBEDDING_MODEL / GOOGLE_EMBEDDING_OUT_DIM never serves vectors of another space.
+
+`get`/`put` go through both tiers. Async callers use the tiers separately: `peek`
+and `remember` touch memory only and are safe on the event loop, `load` reads
+SQLite (run it in a worker thread) and `persist_later` queues the write on a
+single background writer thread.
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Optional
+import hashlib
+import sqlite3
+import time
+import numpy as np
+from cachetools import LRUCache
+
+
+class _CountingLRU(LRUCache):
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize)
+        self.evictions = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+
+class QueryEmbeddingCache:
+    def __init__(self, space: str, maxsize: int = 2048, path: Optional[str] = None):
+        """
+        Args:
+            space: Identifier of the vector space (model/dim/seed); part of every key.
+            maxsize: Max vectors held in memory.
+            path: SQLite file for the persistent tier; None disables it.
+        """
+        self.space = space
+        self._mem = _CountingLRU(maxsize)
+        self._lock = Lock()
+        # SQLite access is serialized separately so memory lookups never wait on disk
+        self._db_lock = Lock()
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                    "key TEXT PRIMARY KEY, space TEXT NOT NULL, vec BLOB NOT NULL, created REAL NOT NULL)"
+                )
+                self._db.commit()
+            except Exception as e:
+                print("Embedding cache: disk tier disabled:", e)
+                self._db = None
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.space}\x00{text}".encode("utf-8")).hexdigest()
+
+    @property
+    def persistent(self) -> bool:
+        return self._db is not None
+
+    def peek(self, text: str) -> Optional[np.ndarray]:
+        """Memory tier only; a None here is not counted as a miss until `load` confirms it."""
+        key = self._key(text)
+        with self._lock:
+            vec = self._mem.get(key)
+            if vec is not None:
+                self.memory_hits += 1
+            return vec
+
+    def load(self, text: str) -> Optional[np.ndarray]:
+        """Disk tier (blocking); a hit is promoted to memory."""
+        key = self._key(text)
+        row = None
+        if self._db is not None:
+            with self._db_lock:
+                try:
+                    row = self._db.execute(
+                        "SELECT vec FROM query_embeddings WHERE key = ?", (key,)
+                    ).fetchone()
+                except Exception as e:
+                    print("Embedding cache read error:", e)
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            vec = np.frombuffer(row[0], dtype=np.float32)
+            self._mem[key] = vec
+            self.disk_hits += 1
+            return vec
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        vec = self.peek(text)
+        return vec if vec is not None else self.load(text)
+
+    def remember(self, text: str, vec: np.ndarray) -> None:
+        with self._lock:
+            self._mem[self._key(text)] = np.asarray(vec, dtype=np.float32)
+
+    def persist(self, text: str, vec: np.ndarray) -> None:
+        """Write one vector to the disk tier (blocking)."""
+        if self._db is None:
+            return
+        key = self._key(text)
+        vec = np.asarray(vec, dtype=np.float32)
+        with self._db_lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (key, space, vec, created) VALUES (?, ?, ?, ?)",
+                    (key, self.space, vec.tobytes(), time.time()),
+                )
+                self._db.commit()
+            except Exception as e:
+                print("Embedding cache write error:", e)
+
+    def persist_later(self, text: str, vec: np.ndarray) -> None:
+        """Queue a disk write on the background writer and return immediately."""
+        if self._db is None:
+            return
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-cache")
+        self._writer.submit(self.persist, text, vec)
+
+    def put(self, text: str, vec: np.ndarray) -> None:
+        self.remember(text, vec)
+        self.persist(text, vec)
+
+    def stats(self) -> Dict[str, Any]:
+        disk_size = None
+        if self._db is not None:
+            with self._db_lock:
+                try:
+                    disk_size = self._db.execute(
+                        "SELECT COUNT(*) FROM query_embeddings WHERE space = ?", (self.space,)
+                    ).fetchone()[0]
+                except Exception:
+                    pass
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "space": self.space,
+                "memory_size": len(self._mem),
+                "memory_maxsize": self._mem.maxsize,
+                "disk_size": disk_size,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self._mem.evictions,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else None,
+            }
+
+
+__all__ = ["QueryEmbeddingCache"]
@@ -1,8 +1,18 @@
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import lru_cache
-from typing import List, Optional
+from threading import Lock
+from typing import Any, Dict, List, Optional
 import google.generativeai as genai
 import numpy as np
+from google.api_core import exceptions as google_exceptions
+from tenacity import Retrying, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+from service.async_utils import run_blocking
+from service.embedding_cache import QueryEmbeddingCache
+from service.rate_limit import TokenBucket
+from service.text_utils import normalize_text
+from service import metrics
 
 
 # Provider is fixed to Google to avoid local model memory usage
@@ -13,6 +23,45 @@ _out = os.getenv("GOOGLE_EMBEDDING_OUT_DIM")
 GOOGLE_PROJECT_OUT_DIM: Optional[int] = int(_out) if _out else None
 GOOGLE_PROJECT_SEED = int(os.getenv("GOOGLE_EMBEDDING_SEED", "42"))
 
+# Query embedding cache: in-memory LRU size and SQLite path (set EMBEDDING_CACHE_PATH="" to keep it memory-only)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+# Gemini batchEmbedContents accepts at most 100 texts per call
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+# Document embedding (indexers): batches in flight at once, texts per minute allowed
+# upstream (every text in a batch counts against the quota; 0 disables), retry attempts
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+EMBEDDING_RATE_LIMIT = float(os.getenv("EMBEDDING_RATE_LIMIT", "1500"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "6"))
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".vector_cache", "query_embeddings.sqlite3"),
+)
+
+
+# Quota and transient server errors worth backing off on; anything else fails the batch
+_RETRYABLE = (
+    google_exceptions.TooManyRequests,  # includes ResourceExhausted (429)
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+)
+
+# One quota per process, shared by every embeddings instance and worker thread
+_document_bucket = TokenBucket(EMBEDDING_RATE_LIMIT / 60.0, capacity=EMBEDDING_BATCH_SIZE)
+
+
+class EmbeddingError(RuntimeError):
+    """Some documents could not be embedded after retries.
+
+    `vectors` is aligned with the input texts and holds None for the failed
+    ones, so callers can keep the batches that did succeed.
+    """
+
+    def __init__(self, message: str, vectors: List[Optional[List[float]]], failed: List[int]):
+        super().__init__(message)
+        self.vectors = vectors
+        self.failed = failed
+
 
 @lru_cache(maxsize=1)
 def _get_projection_matrix(in_dim: int, out_dim: int, seed: int) -> np.ndarray:
@@ -37,20 +86,196 @@ class GoogleAIEmbeddings:
         self._in_dim = 768
         self._out_dim = GOOGLE_PROJECT_OUT_DIM
         self._proj = _get_projection_matrix(self._in_dim, self._out_dim, GOOGLE_PROJECT_SEED) if self._out_dim else None
+        space = f"{self.model_name}|{self._out_dim or self._in_dim}|{GOOGLE_PROJECT_SEED if self._proj is not None else '-'}"
+        self.cache = QueryEmbeddingCache(space, maxsize=EMBEDDING_CACHE_SIZE, path=EMBEDDING_CACHE_PATH or None) if EMBEDDING_CACHE_SIZE > 0 else None
+        self._doc_stats = {"texts": 0, "failed": 0, "batches": 0, "retries": 0, "seconds": 0.0}
+        # Wall-clock span of embed_documents activity; calls overlap when indexing concurrently
+        self._doc_window: List[float] = []
+        self._doc_lock = Lock()
 
-    def embed_query(self, text: str) -> List[float]:
+    def _to_vector(self, result) -> List[float]:
+        vec = np.asarray(result["embedding"], dtype=np.float32)
+        if self._proj is not None:
+            vec = vec @ self._proj
+        return vec.tolist()
+
+    def _embed(self, text: str) -> List[float]:
+        try:
+            return self._to_vector(genai.embed_content(model=self.model_name, content=text))
+        except Exception as e:
+            print("Google Embedding Error:", e)
+            return []
+
+    async def _aembed(self, text: str) -> List[float]:
         try:
-            result = genai.embed_content(model=self.model_name, content=text)
-            vec = np.asarray(result["embedding"], dtype=np.float32)
-            if self._proj is not None:
-                vec = vec @ self._proj
-            return vec.tolist()
+            return self._to_vector(await genai.embed_content_async(model=self.model_name, content=text))
         except Exception as e:
             print("Google Embedding Error:", e)
             return []
 
+    def _cached(self, text: str):
+        """(cache key, cached vector or None); key is None when caching is disabled."""
+        if self.cache is None:
+            return None, None
+        key = normalize_text(text)
+        vec = self.cache.get(key)
+        return key, (vec.tolist() if vec is not None else None)
+
+    def _store(self, key: Optional[str], out: List[float]) -> None:
+        if key is not None and out:
+            self.cache.put(key, np.asarray(out, dtype=np.float32))
+
+    async def _acached(self, text: str):
+        """Async _cached: the memory tier inline, the SQLite tier in a worker thread."""
+        if self.cache is None:
+            return None, None
+        key = normalize_text(text)
+        vec = self.cache.peek(key)
+        if vec is None:
+            vec = await run_blocking(self.cache.load, key) if self.cache.persistent else self.cache.load(key)
+        return key, (vec.tolist() if vec is not None else None)
+
+    def _astore(self, key: Optional[str], out: List[float]) -> None:
+        """Async _store: memory now, the SQLite write on the cache's background writer."""
+        if key is not None and out:
+            vec = np.asarray(out, dtype=np.float32)
+            self.cache.remember(key, vec)
+            self.cache.persist_later(key, vec)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a search query, served from the two-tier cache when possible.
+
+        Cached queries are keyed on their normalized form, so "Best Lassi  in
+        Varanasi" and "best lassi in varanasi" share one vector; a miss embeds
+        the text exactly as the user wrote it.
+        """
+        key, hit = self._cached(text)
+        if hit is not None:
+            return hit
+        out = self._embed(text)
+        self._store(key, out)
+        return out
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async twin of embed_query using the native grpc.aio client instead of a worker thread."""
+        key, hit = await self._acached(text)
+        if hit is not None:
+            return hit
+        out = await self._aembed(text)
+        self._astore(key, out)
+        return out
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed many queries: cache hits are served locally, distinct misses go upstream
+        in batched embed calls (one per EMBEDDING_BATCH_SIZE texts)."""
+        keys: List[str] = []
+        found: Dict[str, List[float]] = {}
+        # cache key -> first original text with that key, embedded on a miss
+        originals: Dict[str, str] = {}
+        cold: List[str] = []
+        for text in texts:
+            key = normalize_text(text) if self.cache is not None else text
+            keys.append(key)
+            vec = self.cache.peek(key) if self.cache is not None else None
+            if vec is not None:
+                found[key] = vec.tolist()
+            elif key not in originals:
+                originals[key] = text
+                cold.append(key)
+        if cold and self.cache is not None:
+            load = lambda: [self.cache.load(k) for k in cold]
+            # Memory misses go to SQLite in one worker-thread hop
+            loaded = await run_blocking(load) if self.cache.persistent else load()
+            for key, vec in zip(cold, loaded):
+                if vec is not None:
+                    found[key] = vec.tolist()
+                    del originals[key]
+        missing = list(originals)
+        for start in range(0, len(missing), EMBEDDING_BATCH_SIZE):
+            chunk = missing[start:start + EMBEDDING_BATCH_SIZE]
+            try:
+                res = await genai.embed_content_async(model=self.model_name, content=[originals[k] for k in chunk])
+                vectors = [self._to_vector({"embedding": e}) for e in res["embedding"]]
+            except Exception as e:
+                print("Google Embedding Error:", e)
+                vectors = [[] for _ in chunk]
+            for key, vec in zip(chunk, vectors):
+                found[key] = vec
+                self._astore(key if self.cache is not None else None, vec)
+        return [found.get(k, []) for k in keys]
+
+    def _count(self, **deltas: float) -> None:
+        with self._doc_lock:
+            for key, n in deltas.items():
+                self._doc_stats[key] += n
+
+    def document_stats(self) -> Dict[str, Any]:
+        """Throughput of embed_documents since startup."""
+        with self._doc_lock:
+            st = dict(self._doc_stats)
+            span = self._doc_window[1] - self._doc_window[0] if self._doc_window else 0.0
+        st["texts_per_s"] = round(st["texts"] / span, 1) if span else 0.0
+        st["concurrency"] = EMBEDDING_CONCURRENCY
+        st["rate_limit_per_min"] = EMBEDDING_RATE_LIMIT
+        return st
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        """One batch embed call under the shared rate limit, retried with backoff on quota errors."""
+        retrying = Retrying(
+            retry=retry_if_exception_type(_RETRYABLE),
+            wait=wait_exponential_jitter(initial=1, max=60),
+            stop=stop_after_attempt(EMBEDDING_MAX_RETRIES),
+            reraise=True,
+        )
+        for attempt in retrying:
+            with attempt:
+                if attempt.retry_state.attempt_number > 1:
+                    self._count(retries=1)
+                _document_bucket.acquire(len(batch))
+                res = genai.embed_content(model=self.model_name, content=batch)
+        vectors = [self._to_vector({"embedding": e}) for e in res["embedding"]]
+        if len(vectors) != len(batch):
+            raise ValueError(f"expected {len(batch)} embeddings, got {len(vectors)}")
+        return vectors
+
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        return [self.embed_query(t) for t in texts]
+        """Embed documents in EMBEDDING_BATCH_SIZE batches, EMBEDDING_CONCURRENCY at a time.
+
+        Documents bypass the query cache: they are embedded once at index time.
+        Raises EmbeddingError if any batch still fails after retries.
+        """
+        if not texts:
+            return []
+        started = time.perf_counter()
+        spans = [(s, min(s + EMBEDDING_BATCH_SIZE, len(texts))) for s in range(0, len(texts), EMBEDDING_BATCH_SIZE)]
+        out: List[Optional[List[float]]] = [None] * len(texts)
+        failed: List[int] = []
+        errors: List[Exception] = []
+        with ThreadPoolExecutor(max_workers=max(1, min(EMBEDDING_CONCURRENCY, len(spans)))) as pool:
+            futures = {pool.submit(self._embed_batch, texts[s:e]): (s, e) for s, e in spans}
+            for fut in as_completed(futures):
+                s, e = futures[fut]
+                try:
+                    out[s:e] = fut.result()
+                except Exception as exc:
+                    failed.extend(range(s, e))
+                    errors.append(exc)
+        finished = time.perf_counter()
+        self._count(
+            texts=len(texts) - len(failed),
+            failed=len(failed),
+            batches=len(spans),
+            seconds=finished - started,
+        )
+        with self._doc_lock:
+            if not self._doc_window:
+                self._doc_window = [started, finished]
+            else:
+                self._doc_window = [min(self._doc_window[0], started), max(self._doc_window[1], finished)]
+        if failed:
+            print("Google Embedding Error:", errors[0])
+            raise EmbeddingError(f"{len(failed)}/{len(texts)} documents failed to embed: {errors[0]}", out, sorted(failed))
+        return out
 
 
 @lru_cache(maxsize=1)
@@ -60,4 +285,8 @@ def get_embeddings():
     Ensure your Pinecone index dimension matches the embedding size:
     - Google text-embedding-004 => 768 dims (or projected to GOOGLE_EMBEDDING_OUT_DIM)
     """
-    return GoogleAIEmbeddings()
+    emb = GoogleAIEmbeddings()
+    if emb.cache is not None:
+        metrics.register("embedding_cache", emb.cache.stats)
+    metrics.register("embedding_throughput", emb.document_stats)
+    return emb
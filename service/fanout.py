@@ -0,0 +1,71 @@
+"""Multi-category retrieval: one query vector searched across several namespaces at once.
+
+Used by /tralli/query when the caller passes `categories` or `fanout=true`.
+Namespaces are queried concurrently and matches merged by similarity score,
+which is comparable across namespaces because every namespace shares one
+embedding space.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence
+import asyncio
+import os
+
+from service.async_utils import run_blocking
+from service.centroid_router import get_centroid_router
+from service.city_data import CATEGORY_NAMESPACES, namespace_for
+from service.clients import get_vector_index
+from service.metadata_order import ordered_meta
+from service.retrieval import aquery_matches
+
+FANOUT_TOP_K = int(os.getenv("FANOUT_TOP_K", "2"))
+FANOUT_MAX_CATEGORIES = int(os.getenv("FANOUT_MAX_CATEGORIES", "3"))
+# Categories whose centroid score is within this of the best one are searched too
+FANOUT_SPREAD = float(os.getenv("FANOUT_SPREAD", "0.1"))
+FANOUT_DEFAULT_CATEGORIES = ("place", "food", "hiddengem")
+
+
+def choose_categories(city: str, qvec: Sequence[float], requested: Optional[List[str]] = None) -> List[str]:
+    """Explicit categories (validated, de-duplicated) or the nearest centroids."""
+    if requested:
+        out = [c.strip().lower() for c in requested]
+        return [c for c in dict.fromkeys(out) if c in CATEGORY_NAMESPACES]
+    try:
+        scores = get_centroid_router().scores(city, qvec) if qvec else {}
+    except Exception as e:
+        print("Fan-out centroid scoring error:", e)
+        scores = {}
+    if not scores:
+        return list(FANOUT_DEFAULT_CATEGORIES)
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    best = ranked[0][1]
+    return [c for c, s in ranked[:FANOUT_MAX_CATEGORIES] if best - s <= FANOUT_SPREAD]
+
+
+async def achoose_categories(city: str, qvec: Sequence[float], requested: Optional[List[str]] = None) -> List[str]:
+    if requested or get_centroid_router().is_built(city):
+        return choose_categories(city, qvec, requested)
+    # First use for the city loads its namespace vectors from disk
+    return await run_blocking(choose_categories, city, qvec, requested)
+
+
+async def afanout(city: str, qvec: Sequence[float], categories: List[str], top_k: int = FANOUT_TOP_K) -> List[Dict[str, Any]]:
+    """Search each category's namespace concurrently; [{'category', 'score', 'metadata'}] by descending score."""
+    index = get_vector_index()
+    if index is None or not qvec or not categories:
+        return []
+    found = await asyncio.gather(
+        *(aquery_matches(index, namespace_for(city, c), qvec, top_k) for c in categories),
+        return_exceptions=True,
+    )
+    merged: List[Dict[str, Any]] = []
+    for category, matches in zip(categories, found):
+        if isinstance(matches, BaseException):
+            print(f"Fan-out query error ({category}):", matches)
+            continue
+        for m in matches:
+            merged.append({"category": category, "score": m.get("score") or 0.0, "metadata": ordered_meta(m["metadata"], content_type=category)})
+    merged.sort(key=lambda m: m["score"], reverse=True)
+    return merged
+
+
+__all__ = ["choose_categories", "achoose_categories", "afanout", "FANOUT_TOP_K"]
@@ -0,0 +1,72 @@
+from __future__ import annotations
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+def damerau_levenshtein(a: str, b: str) -> int:
+    """Optimal string alignment distance: insert/delete/substitute plus adjacent transposition."""
+    if a == b:
+        return 0
+    la, lb = len(a), len(b)
+    if not la:
+        return lb
+    if not lb:
+        return la
+    prev2: List[int] = []
+    prev = list(range(lb + 1))
+    for i in range(1, la + 1):
+        cur = [i] + [0] * lb
+        ca = a[i - 1]
+        for j in range(1, lb + 1):
+            cb = b[j - 1]
+            cost = 0 if ca == cb else 1
+            d = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                d = min(d, prev2[j - 2] + 1)
+            cur[j] = d
+        prev2, prev = prev, cur
+    return prev[lb]
+
+
+class BKTree:
+    """Burkhard-Keller tree for nearest-neighbour lookups under an edit-distance metric."""
+
+    def __init__(self, words: Iterable[str] = (), distance: Callable[[str, str], int] = damerau_levenshtein):
+        self._distance = distance
+        self._root: Optional[Tuple[str, Dict[int, tuple]]] = None
+        for w in words:
+            self.add(w)
+
+    def add(self, word: str) -> None:
+        if self._root is None:
+            self._root = (word, {})
+            return
+        node = self._root
+        while True:
+            d = self._distance(word, node[0])
+            if d == 0:
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = (word, {})
+                return
+            node = child
+
+    def search(self, word: str, max_distance: int) -> List[Tuple[int, str]]:
+        """All stored words within max_distance of word, sorted by (distance, word)."""
+        if self._root is None:
+            return []
+        out: List[Tuple[int, str]] = []
+        stack = [self._root]
+        while stack:
+            value, children = stack.pop()
+            d = self._distance(word, value)
+            if d <= max_distance:
+                out.append((d, value))
+            for cd, child in children.items():
+                if d - max_distance <= cd <= d + max_distance:
+                    stack.append(child)
+        out.sort()
+        return out
+
+
+__all__ = ["damerau_levenshtein", "BKTree"]
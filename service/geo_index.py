@@ -0,0 +1,100 @@
+"""Per-city spatial index over every POI category that carries lat/lon.
+
+Points are stored as unit vectors on the sphere in a cKDTree; a radius query
+becomes a ball query with the equivalent chord length, and exact great-circle
+distances for the hits are computed with a vectorized haversine.
+"""
+from __future__ import annotations
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from scipy.spatial import cKDTree
+
+from service.city_data import load_canonical
+
+EARTH_RADIUS_KM = 6371.0088
+GEO_CATEGORIES = ("food", "place", "shop", "hiddengem", "accommodation", "nearbyspot")
+
+
+def _unit(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    clat = np.cos(lat)
+    return np.column_stack((clat * np.cos(lon), clat * np.sin(lon), np.sin(lat)))
+
+
+def haversine_km(lat1: float, lon1: float, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Distances (km) from one point to arrays of points; all angles in radians."""
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _coord(value: Any) -> Optional[float]:
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return None
+    return v if np.isfinite(v) else None
+
+
+class CityGeoIndex:
+    def __init__(self, city: str, categories: Sequence[str] = GEO_CATEGORIES):
+        self.city = city
+        self.categories = list(categories)
+        lats: List[float] = []
+        lons: List[float] = []
+        codes: List[int] = []
+        self.records: List[Dict[str, Any]] = []
+        for code, category in enumerate(self.categories):
+            for r in load_canonical(city, category):
+                lat, lon = _coord(r.get("lat")), _coord(r.get("lon"))
+                if lat is None or lon is None or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                    continue
+                lats.append(lat)
+                lons.append(lon)
+                codes.append(code)
+                self.records.append(r)
+        self.lat = np.radians(np.asarray(lats, dtype=np.float64))
+        self.lon = np.radians(np.asarray(lons, dtype=np.float64))
+        self.codes = np.asarray(codes, dtype=np.int16)
+        self._tree = cKDTree(_unit(self.lat, self.lon)) if lats else None
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def nearby(
+        self,
+        lat: float,
+        lon: float,
+        radius_km: float,
+        categories: Optional[Sequence[str]] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """[{'category', 'distanceKm', 'record'}] within radius_km, nearest first."""
+        if self._tree is None or radius_km <= 0 or limit <= 0:
+            return []
+        qlat, qlon = np.radians(lat), np.radians(lon)
+        chord = 2.0 * np.sin(min(radius_km / EARTH_RADIUS_KM, np.pi) / 2.0)
+        idx = np.asarray(self._tree.query_ball_point(_unit(np.array([qlat]), np.array([qlon]))[0], chord), dtype=np.int64)
+        if categories:
+            wanted = [self.categories.index(c) for c in categories if c in self.categories]
+            idx = idx[np.isin(self.codes[idx], wanted)]
+        if idx.size == 0:
+            return []
+        dist = haversine_km(qlat, qlon, self.lat[idx], self.lon[idx])
+        keep = dist <= radius_km
+        idx, dist = idx[keep], dist[keep]
+        if idx.size > limit:
+            part = np.argpartition(dist, limit - 1)[:limit]
+            idx, dist = idx[part], dist[part]
+        order = np.argsort(dist, kind="stable")
+        return [
+            {"category": self.categories[self.codes[i]], "distanceKm": round(float(d), 3), "record": self.records[i]}
+            for i, d in zip(idx[order].tolist(), dist[order].tolist())
+        ]
+
+
+@lru_cache(maxsize=16)
+def get_geo_index(city: str) -> CityGeoIndex:
+    return CityGeoIndex(city.lower())
+
+
+__all__ = ["CityGeoIndex", "get_geo_index", "haversine_km", "GEO_CATEGORIES"]
@@ -0,0 +1,231 @@
+"""Incremental indexing: only re-embed records whose embedding text changed.
+
+The indexer keeps one manifest per namespace under VECTOR_CACHE_DIR/manifests/,
+mapping each record's `_id` to its vector id and to hashes of the text it was
+embedded from and of the metadata that was upserted with it. On a rerun:
+
+- new records and records whose text changed are embedded and upserted,
+- records whose metadata alone changed get a metadata-only `update`,
+- vectors of records that disappeared from the data file are deleted,
+- everything else is left alone.
+
+Vector ids stay stable across runs, so the local vector cache can be patched
+in place instead of re-exported from Pinecone.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+import hashlib
+import json
+import os
+
+from service.embeddings import EmbeddingError
+from service.local_index import VECTOR_CACHE_DIR, patch_vector_cache, write_vector_cache
+
+UPSERT_CHUNK = 100
+
+
+def content_hash(value: Any) -> str:
+    raw = value if isinstance(value, str) else json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _manifest_path(namespace: str, cache_dir: Path) -> Path:
+    return Path(cache_dir) / "manifests" / f"{namespace}.json"
+
+
+def load_manifest(namespace: str, cache_dir: Path = VECTOR_CACHE_DIR) -> Dict[str, Dict[str, Any]]:
+    path = _manifest_path(namespace, cache_dir)
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception as e:
+        print(f"Manifest read error ({namespace}):", e)
+        return {}
+
+
+def save_manifest(namespace: str, entries: Dict[str, Dict[str, Any]], cache_dir: Path = VECTOR_CACHE_DIR) -> None:
+    path = _manifest_path(namespace, cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(entries, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class SyncPlan:
+    """What one indexer run has to do for a namespace; positions index into the record list."""
+
+    __slots__ = ("keys", "ids", "entries", "embed", "update", "unchanged", "delete")
+
+    def __init__(self):
+        self.keys: List[str] = []  # manifest key per record
+        self.ids: List[str] = []  # vector id per record
+        self.entries: List[Dict[str, Any]] = []  # new manifest entry per record
+        self.embed: List[int] = []
+        self.update: List[int] = []
+        self.unchanged: List[int] = []
+        self.delete: List[str] = []  # vector ids
+
+
+def plan_sync(
+    id_prefix: str,
+    texts: Sequence[str],
+    metas: Sequence[Dict[str, Any]],
+    manifest: Dict[str, Dict[str, Any]],
+    full: bool = False,
+) -> SyncPlan:
+    """Diff the current records against the manifest.
+
+    Records without an `_id` are keyed by position. New records get the
+    positional id `<id_prefix>-<i>` (the scheme the full indexer always used)
+    unless a surviving or just-deleted vector already owns it.
+    """
+    plan = SyncPlan()
+    taken = {e["id"] for e in manifest.values()}
+    seen = set()
+    fresh: List[int] = []
+    for i, (text, meta) in enumerate(zip(texts, metas)):
+        key = str(meta.get("_id") or f"#{i}")
+        if key in seen:
+            key = f"{key}#{i}"
+        seen.add(key)
+        entry = {"text": content_hash(text), "meta": content_hash(meta), "fields": sorted(meta)}
+        old = manifest.get(key)
+        plan.keys.append(key)
+        plan.ids.append(old["id"] if old else "")
+        plan.entries.append(entry)
+        if old is None:
+            fresh.append(i)
+            plan.embed.append(i)
+        elif full or old.get("text") != entry["text"] or not set(old.get("fields", ())) <= set(entry["fields"]):
+            # update(set_metadata=...) merges keys, so a dropped field needs a full upsert
+            plan.embed.append(i)
+        elif old.get("meta") != entry["meta"]:
+            plan.update.append(i)
+        else:
+            plan.unchanged.append(i)
+    next_free = len(texts)
+    for i in fresh:
+        vid = f"{id_prefix}-{i}"
+        while vid in taken:
+            vid = f"{id_prefix}-{next_free}"
+            next_free += 1
+        taken.add(vid)
+        plan.ids[i] = vid
+    for i, vid in enumerate(plan.ids):
+        plan.entries[i]["id"] = vid
+    plan.delete = [e["id"] for k, e in manifest.items() if k not in seen]
+    return plan
+
+
+class PreparedSync:
+    """A namespace whose embeddings are done and whose writes are still pending."""
+
+    __slots__ = ("namespace", "plan", "metas", "manifest", "upserted", "payload", "failed", "total")
+
+    def __init__(self, namespace: str, plan: SyncPlan, metas: Sequence[Dict[str, Any]], manifest: Dict[str, Dict[str, Any]], total: int):
+        self.namespace = namespace
+        self.plan = plan
+        self.metas = metas
+        self.manifest = manifest
+        self.total = total
+        self.upserted: List[int] = []
+        self.payload: List[Dict[str, Any]] = []
+        self.failed = 0
+
+
+def prepare_sync(
+    embeddings: Any,
+    namespace: str,
+    id_prefix: str,
+    texts: Sequence[str],
+    metas: Sequence[Dict[str, Any]],
+    full: bool = False,
+    cache_dir: Path = VECTOR_CACHE_DIR,
+) -> PreparedSync:
+    """Embed stage: diff against the manifest and embed the records that need it."""
+    manifest = load_manifest(namespace, cache_dir)
+    plan = plan_sync(id_prefix, texts, metas, manifest, full=full)
+    prepared = PreparedSync(namespace, plan, metas, manifest, len(texts))
+    try:
+        vectors = embeddings.embed_documents([texts[i] for i in plan.embed]) if plan.embed else []
+    except EmbeddingError as e:
+        # Upsert what did embed; the rest stays out of the manifest and is retried next run
+        print(f"[WARN] {namespace}: {e}")
+        vectors = e.vectors
+    for i, vec in zip(plan.embed, vectors):
+        if not vec:
+            prepared.failed += 1
+            continue
+        prepared.upserted.append(i)
+        prepared.payload.append({"id": plan.ids[i], "values": vec, "metadata": metas[i]})
+    return prepared
+
+
+def apply_sync(index: Any, prepared: PreparedSync, cache_dir: Path = VECTOR_CACHE_DIR) -> Dict[str, int]:
+    """Write stage: push upserts, metadata updates and deletes, then persist the manifest and local cache."""
+    namespace, plan, metas, manifest = prepared.namespace, prepared.plan, prepared.metas, prepared.manifest
+    payload, upserted = prepared.payload, prepared.upserted
+    for start in range(0, len(payload), UPSERT_CHUNK):
+        index.upsert(vectors=payload[start:start + UPSERT_CHUNK], namespace=namespace)
+    for i in plan.update:
+        index.update(id=plan.ids[i], set_metadata=metas[i], namespace=namespace)
+    for start in range(0, len(plan.delete), UPSERT_CHUNK):
+        index.delete(ids=plan.delete[start:start + UPSERT_CHUNK], namespace=namespace)
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    for i in upserted + plan.update + plan.unchanged:
+        entries[plan.keys[i]] = plan.entries[i]
+    for i in set(plan.embed) - set(upserted):
+        # Failed embeddings keep their previous entry (if any) so the next run retries them
+        if plan.keys[i] in manifest:
+            entries[plan.keys[i]] = manifest[plan.keys[i]]
+    save_manifest(namespace, entries, cache_dir)
+
+    ids = [plan.ids[i] for i in upserted]
+    record_ids: List[Optional[str]] = [metas[i].get("_id") for i in upserted]
+    new_vectors = [p["values"] for p in payload]
+    if len(upserted) == prepared.total:
+        write_vector_cache(namespace, ids, record_ids, new_vectors, cache_dir)
+    else:
+        patch_vector_cache(namespace, ids, record_ids, new_vectors, plan.delete, cache_dir)
+
+    return {
+        "embedded": len(upserted),
+        "updated": len(plan.update),
+        "deleted": len(plan.delete),
+        "unchanged": len(plan.unchanged),
+        "failed": prepared.failed,
+    }
+
+
+def sync_namespace(
+    index: Any,
+    embeddings: Any,
+    namespace: str,
+    id_prefix: str,
+    texts: Sequence[str],
+    metas: Sequence[Dict[str, Any]],
+    full: bool = False,
+    cache_dir: Path = VECTOR_CACHE_DIR,
+) -> Dict[str, int]:
+    """Bring one Pinecone namespace in line with its records and return per-action counts.
+
+    `full=True` re-embeds every record but still uses the manifest to keep
+    vector ids stable and to delete vectors of removed records.
+    """
+    return apply_sync(index, prepare_sync(embeddings, namespace, id_prefix, texts, metas, full, cache_dir), cache_dir)
+
+
+__all__ = [
+    "content_hash",
+    "load_manifest",
+    "save_manifest",
+    "plan_sync",
+    "prepare_sync",
+    "apply_sync",
+    "sync_namespace",
+    "SyncPlan",
+    "PreparedSync",
+]
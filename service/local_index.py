@@ -0,0 +1,483 @@
+"""In-process vector index over the city category datasets.
+
+A whole city is a few hundred records, so every namespace (Food-Varanasi,
+Place-Agra, ...) fits in one contiguous float32 matrix and a brute-force
+cosine top-k is cheaper than a network hop to Pinecone.
+
+Enable with RETRIEVAL_BACKEND=local. Record metadata comes from data/<city>/;
+vectors come from VECTOR_CACHE_DIR (one <namespace>.npy matrix plus a
+<namespace>.ids.json sidecar per namespace). A missing namespace is exported
+once from the Pinecone index (when PINECONE_API_KEY is set) and written to
+the cache, so the vectors always match what the indexers upserted. Only
+namespaces that loaded vectors are kept; cities without a data/ directory are
+never loaded or exported.
+
+`LocalVectorIndex.query` mirrors `pinecone.Index.query`, so bots can use it as
+a drop-in for `self.index`.
+
+LOCAL_INDEX_DTYPE=float16|int8 keeps the resident vectors scalar-quantized
+(int8 with one scale per row), 2x/4x smaller than float32. Those namespaces
+score every row on the quantized codes, then rescore the top
+LOCAL_INDEX_RESCORE x top_k candidates exactly against the float32 cache
+file, which is memory-mapped so only the candidate rows are read. Run
+`python -m service.local_index` to compare memory and recall@k per dtype.
+"""
+from __future__ import annotations
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence, Set
+import json
+import os
+import time
+import numpy as np
+from dotenv import load_dotenv
+
+from service.city_data import list_data_cities, load_canonical, load_records, parse_namespace
+from service.metadata_filters import matches_filter
+
+load_dotenv()
+
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "pinecone").strip().lower()
+VECTOR_CACHE_DIR = Path(os.getenv("VECTOR_CACHE_DIR") or Path(__file__).resolve().parents[1] / ".vector_cache")
+
+# Resident vector storage (float32, float16 or int8) and quantized candidates rescored per result
+LOCAL_INDEX_DTYPE = os.getenv("LOCAL_INDEX_DTYPE", "float32").strip().lower()
+LOCAL_INDEX_RESCORE = int(os.getenv("LOCAL_INDEX_RESCORE", "4"))
+# Seconds an empty (uncached, unexportable) namespace is remembered before it is tried again
+LOCAL_INDEX_MISS_TTL = float(os.getenv("LOCAL_INDEX_MISS_TTL", "60"))
+
+_FETCH_BATCH = 100
+# Rows dequantized per step when scoring, bounding the float32 scratch buffer
+_SCORE_BLOCK = 4096
+_DTYPES = ("float32", "float16", "int8")
+# Distinct filters whose row masks are kept per namespace
+_MAX_MASKS = 256
+
+
+def use_local_index() -> bool:
+    return RETRIEVAL_BACKEND == "local"
+
+
+def _cache_paths(namespace: str, cache_dir: Path = VECTOR_CACHE_DIR):
+    return cache_dir / f"{namespace}.npy", cache_dir / f"{namespace}.ids.json"
+
+
+def write_vector_cache(
+    namespace: str,
+    vector_ids: Sequence[str],
+    record_ids: Sequence[Optional[str]],
+    vectors: Sequence[Sequence[float]],
+    cache_dir: Path = VECTOR_CACHE_DIR,
+) -> None:
+    """Persist one namespace's vectors. record_ids are the metadata `_id`s used to join back to data/."""
+    mat_path, ids_path = _cache_paths(namespace, cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Both files are written aside and renamed (sidecar first): a server may
+    # have the old matrix memory-mapped, and a crash must not leave a torn file
+    ids_tmp = ids_path.with_name(ids_path.name + ".tmp")
+    ids_tmp.write_text(
+        json.dumps({"ids": list(vector_ids), "recordIds": list(record_ids)}),
+        encoding="utf-8",
+    )
+    mat_tmp = mat_path.with_name(mat_path.name + ".tmp")
+    with mat_tmp.open("wb") as f:
+        np.save(f, np.asarray(vectors, dtype=np.float32))
+    os.replace(ids_tmp, ids_path)
+    os.replace(mat_tmp, mat_path)
+
+
+def patch_vector_cache(
+    namespace: str,
+    vector_ids: Sequence[str],
+    record_ids: Sequence[Optional[str]],
+    vectors: Sequence[Sequence[float]],
+    delete_ids: Sequence[str] = (),
+    cache_dir: Path = VECTOR_CACHE_DIR,
+) -> bool:
+    """Upsert/delete rows of an existing namespace cache; False when there is no cache to patch.
+
+    Without a cache the namespace is exported from Pinecone on first query instead.
+    """
+    mat_path, ids_path = _cache_paths(namespace, cache_dir)
+    if not (mat_path.exists() and ids_path.exists()):
+        return False
+    if not vectors and not delete_ids:
+        return True
+    try:
+        matrix = np.load(mat_path)
+        sidecar = json.loads(ids_path.read_text(encoding="utf-8"))
+    except Exception as e:
+        print(f"Local index cache read error ({namespace}):", e)
+        return False
+    changed = set(vector_ids) | set(delete_ids)
+    ids: List[str] = []
+    rids: List[Optional[str]] = []
+    rows: List[Any] = []
+    for row, (vid, rid) in enumerate(zip(sidecar.get("ids", []), sidecar.get("recordIds", []))):
+        if vid not in changed:
+            ids.append(vid)
+            rids.append(rid)
+            rows.append(matrix[row])
+    ids.extend(vector_ids)
+    rids.extend(record_ids)
+    rows.extend(np.asarray(v, dtype=np.float32) for v in vectors)
+    write_vector_cache(namespace, ids, rids, rows, cache_dir)
+    return True
+
+
+def quantize(matrix: np.ndarray, dtype: str):
+    """(codes, per-row scales or None) for L2-normalized float32 rows."""
+    if dtype == "float16":
+        return matrix.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(matrix).max(axis=1) / 127.0 if matrix.size else np.zeros(matrix.shape[0])
+        scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+        return np.round(matrix / scales[:, None]).astype(np.int8), scales
+    return matrix, None
+
+
+class _Namespace:
+    __slots__ = ("ids", "metas", "records", "codes", "scales", "exact", "src_rows", "_masks")
+
+    def __init__(
+        self,
+        ids: List[str],
+        metas: List[Dict[str, Any]],
+        matrix: np.ndarray,
+        records: Optional[List[Dict[str, Any]]] = None,
+        dtype: str = "float32",
+        exact: Optional[np.ndarray] = None,
+        src_rows: Optional[np.ndarray] = None,
+    ):
+        self.ids = ids
+        self.metas = metas  # raw records, evaluated by filters
+        self.records = records if records is not None else metas  # canonical-order copies returned as metadata
+        # (n, d) rows, L2-normalized before quantization; float32 unless LOCAL_INDEX_DTYPE says otherwise
+        self.codes, self.scales = quantize(matrix, dtype)
+        # Quantized namespaces only: float32 rows as stored on disk (memory-mapped) and our row -> file row
+        self.exact = exact if self.codes.dtype != np.float32 else None
+        self.src_rows = src_rows
+        self._masks: Dict[str, np.ndarray] = {}
+
+    @property
+    def size(self) -> int:
+        return self.codes.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.codes.shape[1] if self.codes.ndim == 2 else 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Normalized float32 rows (dequantized copy for float16/int8 namespaces)."""
+        if self.codes.dtype == np.float32:
+            return self.codes
+        return self._dequantize(np.arange(self.size))
+
+    def _dequantize(self, rows: np.ndarray) -> np.ndarray:
+        out = self.codes[rows].astype(np.float32)
+        if self.scales is not None:
+            out *= self.scales[rows][:, None]
+        return out
+
+    def _exact_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Normalized float32 rows for rescoring, read from the memory-mapped cache when available."""
+        if self.exact is None or self.src_rows is None:
+            return self._dequantize(rows)
+        out = np.asarray(self.exact[self.src_rows[rows]], dtype=np.float32)
+        return out / (np.linalg.norm(out, axis=1, keepdims=True) + 1e-8)
+
+    def _scores(self, qvec: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        codes = self.codes if rows is None else self.codes[rows]
+        if codes.dtype == np.float32:
+            return codes @ qvec
+        # numpy has no float16/int8 GEMV kernels; dequantize a block at a time into float32
+        out = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], _SCORE_BLOCK):
+            out[start:start + _SCORE_BLOCK] = codes[start:start + _SCORE_BLOCK].astype(np.float32) @ qvec
+        if self.scales is not None:
+            out *= self.scales if rows is None else self.scales[rows]
+        return out
+
+    def mask(self, flt: Dict[str, Any]) -> np.ndarray:
+        """Row indices passing a metadata filter; computed once per distinct filter."""
+        key = json.dumps(flt, sort_keys=True)
+        rows = self._masks.get(key)
+        if rows is None:
+            rows = np.flatnonzero([matches_filter(m, flt) for m in self.metas]) if self.metas else np.zeros(0, dtype=np.int64)
+            if len(self._masks) >= _MAX_MASKS:
+                self._masks.clear()
+            self._masks[key] = rows
+        return rows
+
+    def search(self, qvec: np.ndarray, top_k: int, rows: Optional[np.ndarray] = None) -> List[tuple]:
+        if self.size == 0 or top_k <= 0:
+            return []
+        if rows is not None and rows.size == 0:
+            return []
+        scores = self._scores(qvec, rows)
+        m = scores.shape[0]
+        quantized = self.codes.dtype != np.float32
+        k = min(top_k * max(LOCAL_INDEX_RESCORE, 1) if quantized else top_k, m)
+        if k < m:
+            idx = np.argpartition(-scores, k - 1)[:k]
+        else:
+            idx = np.arange(m)
+        if quantized:
+            # Exact float32 rescoring of the quantized shortlist
+            candidates = idx if rows is None else rows[idx]
+            exact = self._exact_rows(candidates) @ qvec
+            order = np.argsort(-exact)[:top_k]
+            return [(int(candidates[i]), float(exact[i])) for i in order]
+        idx = idx[np.argsort(-scores[idx])]
+        if rows is None:
+            return [(int(i), float(scores[i])) for i in idx]
+        return [(int(rows[i]), float(scores[i])) for i in idx]
+
+
+# Returned for namespaces with no vectors; shared, so callers must not mutate it
+_EMPTY = _Namespace([], [], np.zeros((0, 0), dtype=np.float32))
+
+
+class LocalVectorIndex:
+    """Brute-force cosine index with the same query() surface as a Pinecone Index."""
+
+    def __init__(self, cache_dir: Path = VECTOR_CACHE_DIR, source: Any = None, dtype: str = LOCAL_INDEX_DTYPE):
+        if dtype not in _DTYPES:
+            print(f"Local index: unknown LOCAL_INDEX_DTYPE '{dtype}', using float32")
+            dtype = "float32"
+        self.cache_dir = Path(cache_dir)
+        self._source = source  # optional remote pinecone.Index used to seed the cache
+        self.dtype = dtype
+        self._namespaces: Dict[str, _Namespace] = {}
+        # Namespaces already tried against Pinecone, so a missing one costs one export attempt
+        self._exported: Set[str] = set()
+        # Namespaces that came up empty -> when; retried after LOCAL_INDEX_MISS_TTL seconds
+        self._missing: Dict[str, float] = {}
+        self._lock = Lock()
+
+    def _export(self, namespace: str) -> bool:
+        if self._source is None or namespace in self._exported:
+            return False
+        self._exported.add(namespace)
+        try:
+            vector_ids: List[str] = []
+            for page in self._source.list(namespace=namespace):
+                vector_ids.extend(page)
+            if not vector_ids:
+                return False
+            ids: List[str] = []
+            record_ids: List[Optional[str]] = []
+            vectors: List[List[float]] = []
+            for start in range(0, len(vector_ids), _FETCH_BATCH):
+                res = self._source.fetch(ids=vector_ids[start:start + _FETCH_BATCH], namespace=namespace)
+                for vid, v in (res.vectors or {}).items():
+                    ids.append(vid)
+                    record_ids.append((v.metadata or {}).get("_id"))
+                    vectors.append(list(v.values))
+            write_vector_cache(namespace, ids, record_ids, vectors, self.cache_dir)
+            print(f"Local index: exported {len(ids)} vectors for '{namespace}'")
+            return True
+        except Exception as e:
+            print(f"Local index export error ({namespace}):", e)
+            return False
+
+    def _build(self, namespace: str) -> Optional[_Namespace]:
+        """Load one namespace; None when it isn't a data/ city's namespace at all."""
+        parsed = parse_namespace(namespace)
+        if parsed is None or parsed[0] not in list_data_cities():
+            return None
+        city, category = parsed
+        mat_path, ids_path = _cache_paths(namespace, self.cache_dir)
+        if not (mat_path.exists() and ids_path.exists()) and not self._export(namespace):
+            print(f"Local index: no vectors for '{namespace}'")
+            return _EMPTY
+        records = load_records(city, category)
+        canonical = load_canonical(city, category)
+        by_record_id = {r.get("_id"): i for i, r in enumerate(records) if r.get("_id")}
+        rows: List[int] = []
+        ids: List[str] = []
+        positions: List[int] = []
+        try:
+            # Quantized namespaces keep the file mapped for exact rescoring instead of resident
+            raw = np.load(mat_path, mmap_mode="r" if self.dtype != "float32" else None)
+            sidecar = json.loads(ids_path.read_text(encoding="utf-8"))
+            vector_ids, record_ids = sidecar.get("ids", []), sidecar.get("recordIds", [])
+            if not (len(vector_ids) == len(record_ids) == raw.shape[0]):
+                # e.g. a crash between the two renames in write_vector_cache
+                raise ValueError(f"{len(vector_ids)} ids / {len(record_ids)} record ids for {raw.shape[0]} rows")
+            taken = set()
+            for row, (vid, rid) in enumerate(zip(vector_ids, record_ids)):
+                if rid:
+                    # A record _id no longer in the data file is a stale vector, not a positional one
+                    pos = by_record_id.get(rid)
+                else:
+                    # Older vectors without _id metadata: fall back to the positional id suffix
+                    suffix = vid.rsplit("-", 1)[-1]
+                    pos = int(suffix) if suffix.isdigit() and int(suffix) < len(records) else None
+                if pos is None or pos in taken:
+                    continue
+                taken.add(pos)
+                rows.append(row)
+                ids.append(vid)
+                positions.append(pos)
+            matrix = np.ascontiguousarray(raw[rows], dtype=np.float32)
+        except Exception as e:
+            print(f"Local index load error ({namespace}):", e)
+            return _EMPTY
+
+        if matrix.size:
+            matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-8
+        return _Namespace(
+            ids,
+            [records[p] for p in positions],
+            matrix,
+            [canonical[p] for p in positions],
+            dtype=self.dtype,
+            exact=raw if self.dtype != "float32" else None,
+            src_rows=np.asarray(rows, dtype=np.int64),
+        )
+
+    def is_loaded(self, namespace: str) -> bool:
+        return namespace in self._namespaces
+
+    def has_vectors(self, namespace: str) -> bool:
+        """True when the namespace is loaded or cached on disk, i.e. namespace() won't export from Pinecone."""
+        if namespace in self._namespaces:
+            return True
+        mat_path, ids_path = _cache_paths(namespace, self.cache_dir)
+        return mat_path.exists() and ids_path.exists()
+
+    def namespace(self, namespace: str) -> _Namespace:
+        ns = self._namespaces.get(namespace)
+        if ns is None:
+            with self._lock:
+                ns = self._namespaces.get(namespace)
+                if ns is None:
+                    missed = self._missing.get(namespace)
+                    if missed is not None and time.monotonic() - missed < LOCAL_INDEX_MISS_TTL:
+                        return _EMPTY
+                    ns = self._build(namespace)
+                    if ns is None:
+                        # Not a data/ city: never kept, or bogus cities would grow the dicts without bound
+                        return _EMPTY
+                    if ns.size:
+                        self._namespaces[namespace] = ns
+                        self._missing.pop(namespace, None)
+                    else:
+                        # No cache and no export: don't rebuild (and re-log) on every query
+                        self._missing[namespace] = time.monotonic()
+        return ns
+
+    def query(
+        self,
+        vector: Optional[Sequence[float]] = None,
+        top_k: int = 2,
+        include_metadata: bool = True,
+        include_values: bool = False,
+        namespace: str = "",
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        ns = self.namespace(namespace)
+        if vector is None or len(vector) == 0 or ns.size == 0:
+            return {"matches": [], "namespace": namespace}
+        q = np.asarray(vector, dtype=np.float32)
+        if q.shape[0] != ns.dim:
+            print(f"Local index: query dim {q.shape[0]} != index dim {ns.dim} for '{namespace}'")
+            return {"matches": [], "namespace": namespace}
+        q = q / (np.linalg.norm(q) + 1e-8)
+        matches = []
+        rows = ns.mask(filter) if filter else None
+        for i, score in ns.search(q, top_k, rows):
+            m: Dict[str, Any] = {"id": ns.ids[i], "score": score}
+            if include_metadata:
+                m["metadata"] = ns.records[i]
+            if include_values:
+                m["values"] = ns._exact_rows(np.asarray([i]))[0].tolist()
+            matches.append(m)
+        return {"matches": matches, "namespace": namespace}
+
+    def recall_at_k(self, namespace: str, k: int = 2, queries: Optional[np.ndarray] = None, samples: int = 200, noise: float = 0.3) -> float:
+        """Share of the exact float32 top-k that this index's search also returns.
+
+        Without `queries`, probes are stored rows plus Gaussian noise (seeded),
+        i.e. queries that land near, but not on, an indexed record.
+        """
+        ns = self.namespace(namespace)
+        if ns.size == 0:
+            return 1.0
+        exact = ns._exact_rows(np.arange(ns.size))
+        if queries is None:
+            rng = np.random.default_rng(0)
+            picks = rng.integers(0, ns.size, size=min(samples, ns.size * 4))
+            queries = exact[picks] + rng.normal(scale=noise / np.sqrt(ns.dim), size=(len(picks), ns.dim)).astype(np.float32)
+        queries = np.asarray(queries, dtype=np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True) + 1e-8
+        k = min(k, ns.size)
+        hits = 0
+        for q in queries:
+            truth = set(np.argsort(-(exact @ q))[:k].tolist())
+            hits += len(truth & {i for i, _ in ns.search(q, k)})
+        return hits / (k * len(queries))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            loaded = list(self._namespaces.values())
+        return {
+            "dtype": self.dtype,
+            "rescore": LOCAL_INDEX_RESCORE if self.dtype != "float32" else 0,
+            "namespaces": len(loaded),
+            "vectors": sum(ns.size for ns in loaded),
+            "resident_bytes": sum(ns.nbytes for ns in loaded),
+        }
+
+    def reset(self) -> None:
+        """Drop loaded namespaces so the next query reloads vectors and data files."""
+        from service.bm25 import get_bm25
+        with self._lock:
+            self._namespaces.clear()
+            self._exported.clear()
+            self._missing.clear()
+        load_records.cache_clear()
+        load_canonical.cache_clear()
+        get_bm25.cache_clear()
+
+
+@lru_cache(maxsize=1)
+def get_local_index() -> LocalVectorIndex:
+    # Imported lazily: service.clients depends on this module
+    from service.clients import get_pinecone_index
+    from service import metrics
+    index = LocalVectorIndex(source=get_pinecone_index())
+    metrics.register("local_index", index.stats)
+    return index
+
+
+__all__ = ["LocalVectorIndex", "get_local_index", "use_local_index", "write_vector_cache", "patch_vector_cache", "RETRIEVAL_BACKEND"]
+
+
+if __name__ == "__main__":
+    # Memory and recall@k of each storage dtype over the cached namespaces
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare local index storage dtypes.")
+    parser.add_argument("--k", type=int, default=2)
+    parser.add_argument("--cache-dir", type=Path, default=VECTOR_CACHE_DIR)
+    args = parser.parse_args()
+    names = sorted(p.name[:-len(".npy")] for p in args.cache_dir.glob("*.npy"))
+    for dtype in _DTYPES:
+        index = LocalVectorIndex(args.cache_dir, dtype=dtype)
+        recalls = []
+        started = time.perf_counter()
+        for name in names:
+            if index.namespace(name).size:
+                recalls.append(index.recall_at_k(name, args.k))
+        st = index.stats()
+        avg = sum(recalls) / len(recalls) if recalls else 0.0
+        print(f"{dtype:8} {st['vectors']:6} vectors {st['resident_bytes'] / 1024:9.1f} KiB  recall@{args.k} {avg:.4f}  ({time.perf_counter() - started:.2f}s)")
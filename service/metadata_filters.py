@@ -0,0 +1,134 @@
+"""Metadata filters executed inside the retrieval engine.
+
+Bots express their filters (food category, minimum taste rating, ...) as
+Pinecone-style filter dicts. Pinecone evaluates them server-side; the local
+index and the BM25 engine evaluate them with `matches_filter`.
+
+Filterable fields are derived at index time by `with_filter_fields`:
+`categoryTags` (lowercased tags split out of "Lassi, Juice Center") and
+numeric ratings coerced to float, since Pinecone range operators only apply
+to numbers.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+import re
+
+NUMERIC_FIELDS = ("taste", "hygiene", "valueForMoney", "service")
+# Source of categoryTags: the record's category, or what a shop is famous for
+TAG_SOURCES = ("category", "famousFor")
+
+_TAG_SPLIT_RE = re.compile(r"\s*(?:,|/|&|\band\b)\s*")
+
+
+def category_tags(value: Any) -> List[str]:
+    if isinstance(value, list):
+        value = ",".join(str(v) for v in value if v is not None)
+    if not isinstance(value, str):
+        return []
+    return [t for t in dict.fromkeys(p.strip().lower() for p in _TAG_SPLIT_RE.split(value)) if t]
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def with_filter_fields(meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a record's metadata with categoryTags and typed numeric fields added."""
+    out = dict(meta)
+    for source in TAG_SOURCES:
+        tags = category_tags(meta.get(source))
+        if tags:
+            out["categoryTags"] = tags
+            break
+    for field in NUMERIC_FIELDS:
+        if field in meta:
+            num = _number(meta[field])
+            if num is None:
+                out.pop(field, None)
+            else:
+                out[field] = num
+    return out
+
+
+def build_filter(
+    category: Optional[str] = None,
+    min_taste: Optional[float] = None,
+    min_hygiene: Optional[float] = None,
+    min_value: Optional[float] = None,
+    section: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """Pinecone filter for the bots' optional arguments; None when nothing is filtered."""
+    clauses: List[Dict[str, Any]] = []
+    tags = category_tags(category) if category else []
+    if tags:
+        clauses.append({"categoryTags": {"$in": tags}})
+    for field, bound in (("taste", min_taste), ("hygiene", min_hygiene), ("valueForMoney", min_value)):
+        if bound is not None:
+            clauses.append({field: {"$gte": float(bound)}})
+    if section:
+        clauses.append({"section": {"$eq": section.strip().lower()}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def _field_value(meta: Dict[str, Any], field: str) -> Any:
+    if field == "categoryTags" and field not in meta:
+        for source in TAG_SOURCES:
+            tags = category_tags(meta.get(source))
+            if tags:
+                return tags
+        return []
+    value = meta.get(field)
+    if field in NUMERIC_FIELDS:
+        return _number(value)
+    if field == "section" and isinstance(value, str):
+        return value.strip().lower()
+    return value
+
+
+def _compare(value: Any, op: str, operand: Any) -> bool:
+    values = value if isinstance(value, list) else [value]
+    if op == "$eq":
+        return operand in values
+    if op == "$ne":
+        return operand not in values
+    if op == "$in":
+        return any(v in operand for v in values)
+    if op == "$nin":
+        return not any(v in operand for v in values)
+    if op in ("$gt", "$gte", "$lt", "$lte"):
+        num = _number(value) if not isinstance(value, list) else None
+        if num is None:
+            return False
+        return {"$gt": num > operand, "$gte": num >= operand, "$lt": num < operand, "$lte": num <= operand}[op]
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def matches_filter(meta: Dict[str, Any], flt: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Pinecone-style filter against one record's metadata."""
+    if not flt:
+        return True
+    for key, cond in flt.items():
+        if key == "$and":
+            if not all(matches_filter(meta, c) for c in cond):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(meta, c) for c in cond):
+                return False
+        else:
+            value = _field_value(meta, key)
+            ops = cond if isinstance(cond, dict) else {"$eq": cond}
+            if not all(_compare(value, op, operand) for op, operand in ops.items()):
+                return False
+    return True
+
+
+__all__ = ["build_filter", "matches_filter", "with_filter_fields", "category_tags", "NUMERIC_FIELDS"]
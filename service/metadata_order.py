@@ -1,5 +1,6 @@
 from __future__ import annotations
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+import orjson
 
 # Canonical key orders per detected content type
 FOOD_ORDER: List[str] = [
@@ -21,7 +22,7 @@ SOUVENIR_ORDER: List[str] = [
 ]
 
 TRANSPORT_ORDER: List[str] = [
-    '_id','cityId','cityName','from','to','autoPrice','cabPrice','bikePrice','premium'
+    '_id','cityId','cityName','from','to','autoPrice','cabPrice','bikePrice','premium','inferred'
 ]
 
 # New category canonical orders
@@ -102,17 +103,66 @@ def _choose_order(meta: Dict[str, Any]) -> List[str]:
     return list(meta.keys())  # fallback: keep whatever order we got
 
 
-def ordered_meta(meta: Dict[str, Any], drop_missing: bool = True) -> Dict[str, Any]:
+# Content type -> compiled key tuple; the router categories double as content types
+ORDERS: Dict[str, Tuple[str, ...]] = {
+    'food': tuple(FOOD_ORDER),
+    'place': tuple(PLACE_ORDER),
+    'souvenir': tuple(SOUVENIR_ORDER),
+    'shop': tuple(SHOP_ORDER),
+    'transport': tuple(TRANSPORT_ORDER),
+    'accommodation': tuple(ACCOMMODATION_ORDER),
+    'activity': tuple(ACTIVITY_ORDER),
+    'cityinfo': tuple(CITYINFO_ORDER),
+    'connectivity': tuple(CONNECTIVITY_ORDER),
+    'hiddengem': tuple(HIDDENGEM_ORDER),
+    'itinerary': tuple(ITINERARY_ORDER),
+    'misc': tuple(MISC_ORDER),
+    'nearbyspot': tuple(NEARBYSPOT_ORDER),
+}
+
+
+class OrderedRecord(dict):
+    """A record already in canonical key order, tagged with its content type.
+
+    Built once when data is loaded and shared read-only: ordered_meta returns it
+    as is, and `fragment` holds its pre-encoded JSON for FragmentJSONResponse.
+    """
+    __slots__ = ('content_type', 'fragment')
+
+    def __init__(self, items, content_type: str):
+        super().__init__(items)
+        self.content_type = content_type
+        self.fragment: Optional[orjson.Fragment] = None
+
+
+def canonical_record(meta: Dict[str, Any], content_type: Optional[str] = None) -> OrderedRecord:
+    """Reorder (and JSON-encode) a record once, at load/index time, for its content type."""
+    order = ORDERS[content_type] if content_type in ORDERS else _choose_order(meta)
+    rec = OrderedRecord(((k, meta[k]) for k in order if k in meta), content_type or '')
+    try:
+        rec.fragment = orjson.Fragment(orjson.dumps(rec))
+    except TypeError:
+        pass  # not JSON-encodable as is; responses encode it per request
+    return rec
+
+
+def ordered_meta(meta: Dict[str, Any], drop_missing: bool = True, content_type: Optional[str] = None) -> Dict[str, Any]:
     """Return a new dict with keys ordered canonically.
 
     Args:
         meta: Original metadata dict.
         drop_missing: If True, only include keys present in meta; otherwise include
                       all canonical keys inserting None for missing.
+        content_type: Known content type (see ORDERS); skips sniffing the keys.
     """
-    order = _choose_order(meta)
+    if drop_missing and type(meta) is OrderedRecord:
+        # Already canonical; shared, so callers must not mutate it
+        return meta
+    order = ORDERS.get(content_type) if content_type else None
+    if order is None:
+        order = _choose_order(meta)
     if drop_missing:
         return {k: meta[k] for k in order if k in meta}
     return {k: meta.get(k) for k in order}
 
-__all__ = ['ordered_meta']
+__all__ = ['ordered_meta', 'canonical_record', 'OrderedRecord', 'ORDERS']
@@ -0,0 +1,28 @@
+from __future__ import annotations
+from threading import Lock
+from typing import Any, Callable, Dict
+
+# Named providers whose stats are reported by GET /tralli/metrics
+_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+_lock = Lock()
+
+
+def register(name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+    """Register a zero-arg callable returning a JSON-serializable stats dict."""
+    with _lock:
+        _providers[name] = provider
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        providers = dict(_providers)
+    out: Dict[str, Any] = {}
+    for name, provider in providers.items():
+        try:
+            out[name] = provider()
+        except Exception as e:
+            out[name] = {"error": str(e)}
+    return out
+
+
+__all__ = ["register", "snapshot"]
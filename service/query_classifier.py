@@ -19,12 +19,20 @@
 #         return 'miscellaneous'
 
 import os
+from threading import Lock
 from dotenv import load_dotenv
 import google.generativeai as genai
+from cachetools import TTLCache
+from service.text_utils import normalize_text
+from service import metrics
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# Classification cache: a phrasing's category does not change, so skip the LLM call on repeats
+CLASSIFY_CACHE_SIZE = int(os.getenv("CLASSIFY_CACHE_SIZE", "4096"))
+CLASSIFY_CACHE_TTL = float(os.getenv("CLASSIFY_CACHE_TTL", "86400"))
+
 genai.configure(api_key=GEMINI_API_KEY)
 model = genai.GenerativeModel("models/gemini-flash-latest")
 
@@ -32,8 +40,80 @@ CATEGORIES = [
     "place","food","shop","transport","accommodation","activity","hiddengem","itinerary","nearbyspot","cityinfo","connectivity","misc"
 ]
 
+class _ClassificationCache(TTLCache):
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize, ttl)
+        self.evictions = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+
+_cache = _ClassificationCache(max(CLASSIFY_CACHE_SIZE, 1), CLASSIFY_CACHE_TTL)
+_cache_lock = Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _cache_snapshot():
+    with _cache_lock:
+        return {
+            **_cache_stats,
+            "evictions": _cache.evictions,
+            "size": len(_cache),
+            "maxsize": _cache.maxsize,
+            "ttl": _cache.ttl,
+        }
+
+
+metrics.register("classify_cache", _cache_snapshot)
+
+
+def _cache_get(key: str):
+    with _cache_lock:
+        category = _cache.get(key)
+        _cache_stats["hits" if category is not None else "misses"] += 1
+    return category
+
+
+def _cache_put(key: str, category: str) -> None:
+    with _cache_lock:
+        _cache[key] = category
+
+
 def classify_query_with_gemini(query: str) -> str:
-    prompt = f"""
+    """Classify a query into one of CATEGORIES, reusing cached decisions for normalized repeats."""
+    if CLASSIFY_CACHE_SIZE <= 0:
+        return _classify_uncached(query) or "misc"
+    key = normalize_text(query, strip_punct=True)
+    category = _cache_get(key)
+    if category is not None:
+        return category
+    category = _classify_uncached(query)
+    if category is None:
+        return "misc"
+    _cache_put(key, category)
+    return category
+
+
+async def aclassify_query_with_gemini(query: str) -> str:
+    """Async twin of classify_query_with_gemini using generate_content_async."""
+    if CLASSIFY_CACHE_SIZE <= 0:
+        return await _aclassify_uncached(query) or "misc"
+    key = normalize_text(query, strip_punct=True)
+    category = _cache_get(key)
+    if category is not None:
+        return category
+    category = await _aclassify_uncached(query)
+    if category is None:
+        return "misc"
+    _cache_put(key, category)
+    return category
+
+
+def _build_prompt(query: str) -> str:
+    return f"""
 You are a travel assistant that classifies a user query into exactly one of these categories (return only the category word in lowercase):
 - place: tourist attractions, sights, landmarks, temples, ghats, monuments
 - food: restaurants, cafes, dishes, street food, cuisine
@@ -51,14 +131,30 @@ You are a travel assistant that classifies a user query into exactly one of thes
 Query: {query}
 Answer with only one category token.
 """
+
+
+def _parse_answer(text: str) -> str:
+    answer = (text or "").strip().lower()
+    for v in CATEGORIES:
+        if v in answer:
+            return v
+    return "misc"
+
+
+def _classify_uncached(query: str):
+    """Ask Gemini for the category; returns None on upstream errors so failures are not cached."""
     try:
-        response = model.generate_content(prompt)
-        answer = (response.text or "").strip().lower()
-        for v in CATEGORIES:
-            if v in answer:
-                return v
-        return "misc"
+        response = model.generate_content(_build_prompt(query))
+        return _parse_answer(response.text)
     except Exception as e:
         print("Gemini error:", e)
-        return "misc"
+        return None
+
 
+async def _aclassify_uncached(query: str):
+    try:
+        response = await model.generate_content_async(_build_prompt(query))
+        return _parse_answer(response.text)
+    except Exception as e:
+        print("Gemini error:", e)
+        return None
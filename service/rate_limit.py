@@ -0,0 +1,42 @@
+from __future__ import annotations
+from threading import Lock
+from typing import Optional
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket; `rate` tokens per second refill up to `capacity`.
+
+    A request larger than the bucket is still admitted: it drives the balance
+    negative and later callers wait until the debt is paid off, so a batch of
+    100 texts against a 25/s limit simply costs four seconds of quota.
+    rate <= 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(self.rate, 1.0)
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """Take tokens now and return how long the caller must wait before using them."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until `tokens` are available; returns the seconds spent waiting."""
+        wait = self._reserve(tokens)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+__all__ = ["TokenBucket"]
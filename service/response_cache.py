@@ -0,0 +1,151 @@
+"""Full-response cache for /tralli/query.
+
+Entries are keyed on normalized city + normalized query + the city's data
+version, bounded by total encoded size (LRU eviction), fresh for
+RESPONSE_CACHE_TTL seconds and then servable as stale for RESPONSE_CACHE_STALE
+more seconds while one background task recomputes them. The data version
+(a stat of every file under data/<city>/) is re-read at most every
+DATA_VERSION_TTL seconds per city.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+import asyncio
+import os
+import time
+
+from service.city_data import data_version
+from service.responses import render_json
+from service.text_utils import normalize_text
+from service import metrics
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_STALE = float(os.getenv("RESPONSE_CACHE_STALE", "3600"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+DATA_VERSION_TTL = float(os.getenv("DATA_VERSION_TTL", "5"))
+
+HIT, STALE, MISS = "HIT", "STALE", "MISS"
+
+
+class ResponseCache:
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, stale: float = RESPONSE_CACHE_STALE, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.stale = stale
+        self.max_bytes = max_bytes
+        # key -> (value, encoded size, stored at)
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        # city -> (data version, read at)
+        self._versions: Dict[str, Tuple[str, float]] = {}
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "refreshes": 0, "refresh_errors": 0}
+
+    def key(self, city: str, query: str) -> str:
+        return f"{city.lower()}|{self.version(city)}|{normalize_text(query)}"
+
+    def version(self, city: str) -> str:
+        """data_version(city), memoized for DATA_VERSION_TTL seconds so requests don't stat data/ each time."""
+        city = city.lower()
+        now = time.monotonic()
+        cached = self._versions.get(city)
+        if cached is not None and now - cached[1] < DATA_VERSION_TTL:
+            return cached[0]
+        version = data_version(city)
+        self._versions[city] = (version, now)
+        return version
+
+    def get(self, key: str) -> Tuple[Optional[Any], str]:
+        """(value, HIT|STALE) for a servable entry, else (None, MISS)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[2]
+                if age <= self.ttl + self.stale:
+                    self._entries.move_to_end(key)
+                    status = HIT if age <= self.ttl else STALE
+                    self._stats["hits" if status == HIT else "stale_hits"] += 1
+                    return entry[0], status
+                self._drop(key)
+            self._stats["misses"] += 1
+        return None, MISS
+
+    def put(self, key: str, value: Any) -> None:
+        size = len(render_json(value))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def refresh(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        should_cache: Optional[Callable[[Any], bool]] = None,
+    ) -> None:
+        """Recompute a stale entry in the background; at most one refresh per key at a time.
+
+        A value rejected by `should_cache` is dropped and the stale entry kept.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        async def run() -> None:
+            try:
+                value = await compute()
+                if value is not None and (should_cache is None or should_cache(value)):
+                    self.put(key, value)
+                self._stats["refreshes"] += 1
+            except Exception as e:
+                self._stats["refresh_errors"] += 1
+                print("Response cache refresh error:", e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        task = asyncio.get_running_loop().create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._versions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "stale": self.stale,
+            }
+
+
+_cache = ResponseCache()
+metrics.register("response_cache", _cache.stats)
+
+
+def get_response_cache() -> ResponseCache:
+    return _cache
+
+
+__all__ = ["ResponseCache", "get_response_cache", "HIT", "STALE", "MISS"]
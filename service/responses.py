@@ -0,0 +1,42 @@
+"""JSON responses that splice pre-encoded record fragments instead of re-encoding them.
+
+Records loaded through city_data.load_canonical carry their orjson-encoded
+bytes (OrderedRecord.fragment); FragmentJSONResponse writes those bytes
+straight into the envelope. Endpoints return the response object directly so
+FastAPI's jsonable_encoder does not copy the records first.
+"""
+from __future__ import annotations
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+
+from service.metadata_order import OrderedRecord
+
+
+def _default(obj: Any) -> Any:
+    if type(obj) is OrderedRecord and obj.fragment is not None:
+        return obj.fragment
+    # OPT_PASSTHROUGH_SUBCLASS routes every str/int/dict/list subclass here
+    if isinstance(obj, dict):
+        return dict(obj)
+    if isinstance(obj, (list, tuple)):
+        return list(obj)
+    if isinstance(obj, str):
+        return str(obj)
+    if isinstance(obj, int):
+        return int(obj)
+    if isinstance(obj, float):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def render_json(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_PASSTHROUGH_SUBCLASS)
+
+
+class FragmentJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return render_json(content)
+
+
+__all__ = ["FragmentJSONResponse", "render_json"]
@@ -0,0 +1,266 @@
+"""Vector search helpers shared by the bots, with sync and native-asyncio variants.
+
+The async path talks to the Pinecone data plane over a pooled httpx.AsyncClient
+instead of parking a default-executor thread per query; the in-process
+LocalVectorIndex is answered inline once its namespace is loaded.
+
+When the caller passes the query text and HYBRID_SEARCH=1 (off by default), a
+BM25 search over the namespace's records runs alongside the vector search and
+the two rankings are merged by reciprocal rank fusion. The app builds the BM25
+indexes at startup; on the async path BM25 runs in a worker thread.
+"""
+from __future__ import annotations
+import asyncio
+import os
+import time
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence, Set
+import httpx
+from langchain.schema import Document
+
+from service.async_utils import run_blocking
+from service.bm25 import get_bm25
+from service.city_data import CATEGORY_NAMESPACES, load_canonical, parse_namespace
+from service.local_index import LocalVectorIndex
+from service.metadata_filters import NUMERIC_FIELDS, TAG_SOURCES, matches_filter
+from service import metrics
+
+PINECONE_API_VERSION = os.getenv("PINECONE_API_VERSION", "2025-04")
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "200"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "0").strip().lower() not in ("0", "false", "no", "off")
+# Candidates taken from each engine before fusion, and the RRF rank constant
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "10"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _http() -> httpx.AsyncClient:
+    """Process-wide AsyncClient, recreated if the running event loop changed."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def aclose_http() -> None:
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+def _normalize_matches(res: Any) -> List[Dict[str, Any]]:
+    """Pinecone response object or plain dict -> [{'id', 'score', 'metadata'}]."""
+    matches = getattr(res, "matches", None)
+    if matches is None and isinstance(res, dict):
+        matches = res.get("matches")
+    out: List[Dict[str, Any]] = []
+    for m in matches or []:
+        if isinstance(m, dict):
+            out.append({"id": m.get("id"), "score": m.get("score"), "metadata": m.get("metadata") or {}})
+        else:
+            out.append({"id": getattr(m, "id", None), "score": getattr(m, "score", None), "metadata": getattr(m, "metadata", None) or {}})
+    return out
+
+
+_latency: Dict[str, Dict[str, float]] = {}
+_latency_lock = Lock()
+
+
+def _record_latency(engine: str, started: float) -> None:
+    ms = (time.perf_counter() - started) * 1000.0
+    with _latency_lock:
+        st = _latency.setdefault(engine, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        st["count"] += 1
+        st["total_ms"] += ms
+        st["max_ms"] = max(st["max_ms"], ms)
+
+
+def _latency_snapshot() -> Dict[str, Any]:
+    with _latency_lock:
+        out: Dict[str, Any] = {
+            engine: {**st, "avg_ms": st["total_ms"] / st["count"] if st["count"] else 0.0}
+            for engine, st in _latency.items()
+        }
+    out["hybrid"] = HYBRID_SEARCH
+    return out
+
+
+metrics.register("retrieval_latency", _latency_snapshot)
+
+
+def _lexical_matches(namespace: str, text: str, top_k: int, filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    parsed = parse_namespace(namespace)
+    if parsed is None:
+        return []
+    started = time.perf_counter()
+    index, records = get_bm25(*parsed)
+    canonical = load_canonical(*parsed)
+    ranked = index.search(text, len(records) if filter else top_k)
+    if filter:
+        ranked = [(i, score) for i, score in ranked if matches_filter(records[i], filter)][:top_k]
+    out = [
+        {"id": records[i].get("_id") or f"{namespace}#{i}", "score": score, "metadata": canonical[i]}
+        for i, score in ranked
+    ]
+    _record_latency("bm25", started)
+    return out
+
+
+def build_lexical_indexes(cities: Sequence[str]) -> None:
+    """Build every city/category BM25 index up front (app startup) when hybrid search is on."""
+    if not HYBRID_SEARCH:
+        return
+    for city in cities:
+        for category in CATEGORY_NAMESPACES:
+            try:
+                get_bm25(city, category)
+            except Exception as e:
+                print(f"BM25 build error ({city}/{category}):", e)
+
+
+def _fuse(dense: List[Dict[str, Any]], lexical: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+    """Reciprocal rank fusion; records are matched across engines by metadata `_id`."""
+    if not lexical:
+        return dense[:top_k]
+    fused: Dict[str, Dict[str, Any]] = {}
+    for ranking in (dense, lexical):
+        for rank, m in enumerate(ranking):
+            key = m["metadata"].get("_id") or m["id"]
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = {"id": m["id"], "score": 0.0, "metadata": m["metadata"]}
+            entry["score"] += 1.0 / (RRF_K + rank + 1)
+    return sorted(fused.values(), key=lambda m: m["score"], reverse=True)[:top_k]
+
+
+# Namespaces already probed for index-time filter fields after a filtered query matched nothing
+_filter_probed: Set[str] = set()
+
+
+def _should_probe(index: Any, namespace: str, filter: Optional[Dict[str, Any]], matches: List[Dict[str, Any]]) -> bool:
+    # The local index derives filter fields from data/ itself; only remote namespaces can predate them
+    if not filter or matches or isinstance(index, LocalVectorIndex) or namespace in _filter_probed:
+        return False
+    _filter_probed.add(namespace)
+    return True
+
+
+def _check_filter_fields(namespace: str, probe: List[Dict[str, Any]]) -> None:
+    """Warn when a namespace's metadata predates with_filter_fields, so filters can never match."""
+    meta = probe[0]["metadata"] if probe else {}
+    untagged = any(meta.get(src) for src in TAG_SOURCES) and "categoryTags" not in meta
+    untyped = any(isinstance(meta.get(f), str) for f in NUMERIC_FIELDS)
+    if untagged or untyped:
+        print(
+            f"[WARN] {namespace} was indexed without filter fields (categoryTags / numeric ratings); "
+            "filtered queries match nothing until it is re-indexed with `python -m create_memory`."
+        )
+
+
+def to_documents(matches: List[Dict[str, Any]]) -> List[Document]:
+    return [Document(page_content="", metadata=m["metadata"]) for m in matches]
+
+
+def query_matches(
+    index: Any,
+    namespace: str,
+    vector: Sequence[float],
+    top_k: int,
+    filter: Optional[Dict[str, Any]] = None,
+    text: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Top-k matches as [{'id', 'score', 'metadata'}]; hybrid (vector + BM25) when text is given."""
+    hybrid = HYBRID_SEARCH and bool(text)
+    k = max(top_k, HYBRID_CANDIDATES) if hybrid else top_k
+    started = time.perf_counter()
+    kwargs: Dict[str, Any] = dict(
+        vector=vector, top_k=k, include_metadata=True, include_values=False, namespace=namespace
+    )
+    if filter:
+        kwargs["filter"] = filter
+    dense = _normalize_matches(index.query(**kwargs))
+    _record_latency("dense", started)
+    if _should_probe(index, namespace, filter, dense):
+        probe = index.query(vector=vector, top_k=1, include_metadata=True, include_values=False, namespace=namespace)
+        _check_filter_fields(namespace, _normalize_matches(probe))
+    if not hybrid:
+        return dense
+    try:
+        lexical = _lexical_matches(namespace, text, k, filter)
+    except Exception as e:
+        print("BM25 query error:", e)
+        lexical = []
+    return _fuse(dense, lexical, top_k)
+
+
+async def _adense(
+    index: Any,
+    namespace: str,
+    vector: Sequence[float],
+    top_k: int,
+    filter: Optional[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    if isinstance(index, LocalVectorIndex):
+        if index.is_loaded(namespace):
+            return query_matches(index, namespace, vector, top_k, filter)
+        # First touch reads (or exports) the namespace's vectors
+        return await run_blocking(query_matches, index, namespace, vector, top_k, filter)
+    config = getattr(index, "config", None)
+    host = getattr(config, "host", None)
+    api_key = getattr(config, "api_key", None)
+    if not host or not api_key:
+        return await run_blocking(query_matches, index, namespace, vector, top_k, filter)
+    body: Dict[str, Any] = {
+        "vector": list(vector),
+        "topK": top_k,
+        "includeMetadata": True,
+        "includeValues": False,
+        "namespace": namespace,
+    }
+    if filter:
+        body["filter"] = filter
+    started = time.perf_counter()
+    resp = await _http().post(
+        f"{host.rstrip('/')}/query",
+        json=body,
+        headers={"Api-Key": api_key, "X-Pinecone-API-Version": PINECONE_API_VERSION},
+    )
+    resp.raise_for_status()
+    _record_latency("dense", started)
+    matches = _normalize_matches(resp.json())
+    if _should_probe(index, namespace, filter, matches):
+        _check_filter_fields(namespace, await _adense(index, namespace, vector, 1, None))
+    return matches
+
+
+async def aquery_matches(
+    index: Any,
+    namespace: str,
+    vector: Sequence[float],
+    top_k: int,
+    filter: Optional[Dict[str, Any]] = None,
+    text: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Async twin of query_matches; BM25 runs in a worker thread while the vector query is in flight."""
+    if not (HYBRID_SEARCH and text):
+        return await _adense(index, namespace, vector, top_k, filter)
+    k = max(top_k, HYBRID_CANDIDATES)
+    dense_task = asyncio.ensure_future(_adense(index, namespace, vector, k, filter))
+    try:
+        lexical = await run_blocking(_lexical_matches, namespace, text, k, filter)
+    except Exception as e:
+        print("BM25 query error:", e)
+        lexical = []
+    return _fuse(await dense_task, lexical, top_k)
+
+__all__ = ["query_matches", "aquery_matches", "to_documents", "aclose_http", "build_lexical_indexes"]
@@ -0,0 +1,63 @@
+"""Coalesce concurrent identical async calls into one execution.
+
+The first caller for a key starts the work as a task; callers arriving while
+it runs await the same task instead of starting their own.
+"""
+from __future__ import annotations
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+
+from service import metrics
+
+# How many keys with the most coalesced waiters to report
+_TOP_KEYS = 20
+_MAX_TRACKED_KEYS = 1000
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self._coalesced: Counter = Counter()
+        self._stats = {"leaders": 0, "waiters": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self._stats["leaders"] += 1
+            task = asyncio.get_running_loop().create_task(fn())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda _t, k=key: self._done(k))
+        else:
+            self._stats["waiters"] += 1
+            self._waiters[key] += 1
+            self._coalesced[key] += 1
+        # Shielded: one caller disconnecting must not cancel the shared work
+        return await asyncio.shield(task)
+
+    def _done(self, key: str) -> None:
+        self._inflight.pop(key, None)
+        self._waiters.pop(key, None)
+        if len(self._coalesced) > _MAX_TRACKED_KEYS:
+            self._coalesced = Counter(dict(self._coalesced.most_common(_TOP_KEYS)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "inflight": len(self._inflight),
+            "inflight_waiters": {k: n for k, n in self._waiters.items() if n},
+            "top_coalesced": dict(self._coalesced.most_common(_TOP_KEYS)),
+        }
+
+
+def single_flight(name: str) -> SingleFlight:
+    """New group whose counters are reported under `name` in /tralli/metrics."""
+    group = SingleFlight(name)
+    metrics.register(name, group.stats)
+    return group
+
+
+__all__ = ["SingleFlight", "single_flight"]
@@ -0,0 +1,98 @@
+"""Text per record: what the create_memory indexer embeds, and what BM25 searches.
+
+TEXT_SPECS is the one declaration of both: each category's embedding text is
+its (label, field) pairs concatenated and truncated, and BM25 searches the
+same fields (TEXT_FIELDS is derived from it). The record's name field is
+repeated in the lexical text so exact-name queries ("Blue Lassi Shop") rank
+first.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Tuple
+import json
+
+# Router category -> (max embedding text length, (label, field) pairs in text order)
+TEXT_SPECS: Dict[str, Tuple[int, Tuple[Tuple[str, str], ...]]] = {
+    "food": (2048, (("Food:", "foodPlace"), (" Cat:", "category"), (" Menu:", "menuSpecial"), (" Desc:", "description"))),
+    "place": (2048, (("Place:", "places"), (" Cat:", "category"), (" Desc:", "description"), (" Story:", "story"))),
+    "shop": (2048, (("Shop:", "shops"), (" FamousFor:", "famousFor"), (" Price:", "priceRange"))),
+    "transport": (512, (("Route from ", "from"), (" to ", "to"), (" Cab:", "cabPrice"), (" Auto:", "autoPrice"), (" Bike:", "bikePrice"))),
+    "activity": (2048, (("Activity:", "topActivities"), (" Places:", "bestPlaces"), (" Desc:", "description"))),
+    "hiddengem": (2048, (("HiddenGem:", "hiddenGem"), (" Cat:", "category"), (" Desc:", "description"))),
+    "accommodation": (2048, (("Stay:", "hotels"), (" Cat:", "category"), (" Rooms:", "roomTypes"), (" Facilities:", "facilities"))),
+    "connectivity": (2048, (("Connect:", "nearestAirportStationBusStand"), (" Distance:", "distance"), (" Transport:", "majorFlightsTrainsBuses"))),
+    "cityinfo": (2048, (("City:", "cityName"), (" State:", "stateOrUT"), (" Climate:", "climateInfo"), (" History:", "cityHistory"))),
+    "misc": (2048, (("Info:", "localMap"), (" Emergency:", "emergencyContacts"), (" Hospital:", "hospital"))),
+    "nearbyspot": (2048, (("NearbySpot:", "places"), (" Distance:", "distance"), (" Travel:", "travelTime"), (" Desc:", "description"))),
+    "itinerary": (2048, (("Itinerary: Day1:", "day1"), (" Day2:", "day2"), (" Day3:", "day3"))),
+}
+
+# Router category -> fields BM25 searches: exactly those the embedding text is built from
+TEXT_FIELDS: Dict[str, Tuple[str, ...]] = {cat: tuple(f for _, f in pairs) for cat, (_, pairs) in TEXT_SPECS.items()}
+
+# Name field repeated in the lexical text; categories without one get no boost
+NAME_FIELDS: Dict[str, str] = {
+    "food": "foodPlace",
+    "place": "places",
+    "shop": "shops",
+    "activity": "topActivities",
+    "hiddengem": "hiddenGem",
+    "accommodation": "hotels",
+    "cityinfo": "cityName",
+    "nearbyspot": "places",
+}
+
+
+def _flatten(value: Any, out: List[str]) -> None:
+    if isinstance(value, str):
+        if value.strip():
+            out.append(value.strip())
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out.append(str(value))
+    elif isinstance(value, dict):
+        for v in value.values():
+            _flatten(v, out)
+    elif isinstance(value, list):
+        for v in value:
+            _flatten(v, out)
+
+
+def search_text(category: str, record: Dict[str, Any]) -> str:
+    parts: List[str] = []
+    for f in TEXT_FIELDS.get(category, ()):
+        _flatten(record.get(f), parts)
+    name = NAME_FIELDS.get(category)
+    if name:
+        _flatten(record.get(name), parts)
+    return " ".join(parts)
+
+
+def build_text_generic(item: Dict[str, Any]) -> str:
+    # Collect a few common textual fields heuristically
+    keys = ["places", "hiddenGem", "foodPlace", "shops", "hotels", "topActivities", "from", "to", "description", "category"]
+    parts = []
+    for k in keys:
+        v = item.get(k)
+        if isinstance(v, str) and v.strip():
+            parts.append(f"{k}:{v.strip()}")
+    return " | ".join(parts) or json.dumps(item, ensure_ascii=False)[:1000]
+
+
+def _spec_builder(category: str) -> Callable[[Dict[str, Any]], str]:
+    limit, pairs = TEXT_SPECS[category]
+
+    def build(item: Dict[str, Any]) -> str:
+        return "".join(f"{label}{item.get(field, '')}" for label, field in pairs)[:limit]
+
+    build.__name__ = f"build_text_{category}"
+    return build
+
+
+# Router category -> embedding text; categories without an entry use build_text_generic
+TEXT_BUILDERS: Dict[str, Callable[[Dict[str, Any]], str]] = {cat: _spec_builder(cat) for cat in TEXT_SPECS}
+
+
+def embedding_text(category: str, record: Dict[str, Any]) -> str:
+    return TEXT_BUILDERS.get(category, build_text_generic)(record)
+
+
+__all__ = ["TEXT_SPECS", "TEXT_FIELDS", "NAME_FIELDS", "TEXT_BUILDERS", "search_text", "embedding_text", "build_text_generic"]
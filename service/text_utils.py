@@ -0,0 +1,19 @@
+from __future__ import annotations
+import re
+
+_WS_RE = re.compile(r"\s+")
+_PUNCT_RE = re.compile(r"[^\w\s]+", re.UNICODE)
+
+
+def normalize_text(text: str, strip_punct: bool = False) -> str:
+    """Lowercase and collapse whitespace; optionally turn punctuation runs into spaces.
+
+    Used to build cache keys so trivially different phrasings of a query share an entry.
+    """
+    t = (text or "").lower()
+    if strip_punct:
+        t = _PUNCT_RE.sub(" ", t)
+    return _WS_RE.sub(" ", t).strip()
+
+
+__all__ = ["normalize_text"]
@@ -0,0 +1,188 @@
+"""Per-city transport route graph built from Transport_<city>.json.
+
+Each record is a directed edge `from -> to` with auto/cab/bike fare ranges
+("Rs 130-180"). A route that is only listed one way gets a reverse edge with
+the same fares, marked `"inferred": True` since the data never priced it.
+"from X to Y" queries resolve both stop names (exact, substring, then edit
+distance) and Dijkstra finds the cheapest route in a single mode, possibly
+over several legs, so TransportBot only falls back to vector search when the
+query does not name two known stops.
+"""
+from __future__ import annotations
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import heapq
+import os
+import re
+
+from service.city_data import load_records
+from service.fuzzy import BKTree
+from service.text_utils import normalize_text
+
+TRANSPORT_MAX_HOPS = int(os.getenv("TRANSPORT_MAX_HOPS", "3"))
+
+MODES = {"auto": "autoPrice", "cab": "cabPrice", "bike": "bikePrice"}
+_MODE_WORDS = {
+    "auto": "auto", "autos": "auto", "rickshaw": "auto", "tuk": "auto",
+    "cab": "cab", "cabs": "cab", "taxi": "cab", "car": "cab", "uber": "cab", "ola": "cab",
+    "bike": "bike", "bikes": "bike", "scooter": "bike", "rapido": "bike",
+}
+_FILLER = frozenset(
+    "how do i can we go get reach travel fare fares price prices cost costs what is the a an of for by "
+    "take ride route way best cheapest much rs rupees me my in via".split()
+)
+_NUM_RE = re.compile(r"\d+(?:\.\d+)?")
+_ROUTE_RES = (
+    re.compile(r"\bfrom\s+(.+?)\s+(?:to|till|until)\s+(.+)$"),
+    re.compile(r"^(.+?)\s+(?:to|till|until)\s+(.+)$"),
+)
+_PAREN_RE = re.compile(r"\(([^)]*)\)")
+
+Range = Tuple[float, float]
+
+
+def parse_price_range(value: Any) -> Optional[Range]:
+    """'Rs 130-180' -> (130.0, 180.0); 'Rs 200' -> (200.0, 200.0); None when no number."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value), float(value)
+    if not isinstance(value, str):
+        return None
+    nums = [float(n) for n in _NUM_RE.findall(value.replace(",", ""))]
+    if not nums:
+        return None
+    lo, hi = nums[0], nums[1] if len(nums) > 1 else nums[0]
+    # Typos like "Rs 900-100": keep the lower bound rather than an inverted range
+    return (lo, max(lo, hi))
+
+
+def _stop_key(name: str) -> str:
+    # "Banaras Hindu University (BHU)" and "Banaras Hindu University" are one stop
+    return normalize_text(_PAREN_RE.sub(" ", name), strip_punct=True)
+
+
+class TransportGraph:
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.names: Dict[str, str] = {}  # stop key -> display name
+        self.aliases: Dict[str, str] = {}  # parenthesized short names ("bhu") -> stop key
+        # src key -> {dst key: (record, {mode: (lo, hi)})}
+        self.edges: Dict[str, Dict[str, Tuple[Dict[str, Any], Dict[str, Range]]]] = {}
+        for r in records:
+            src, dst = (r.get("from") or "").strip(), (r.get("to") or "").strip()
+            if not src or not dst:
+                continue
+            fares = {m: rng for m, field in MODES.items() if (rng := parse_price_range(r.get(field)))}
+            if not fares:
+                continue
+            a, b = _stop_key(src), _stop_key(dst)
+            self.names.setdefault(a, src)
+            self.names.setdefault(b, dst)
+            self.edges.setdefault(a, {})[b] = (r, fares)
+            for name, key in ((src, a), (dst, b)):
+                for alias in _PAREN_RE.findall(name):
+                    alias = normalize_text(alias, strip_punct=True)
+                    if alias:
+                        self.aliases.setdefault(alias, key)
+        for a, out in list(self.edges.items()):
+            for b, (r, fares) in list(out.items()):
+                if a not in self.edges.get(b, {}):
+                    reverse = {**r, "from": r.get("to"), "to": r.get("from"), "inferred": True}
+                    self.edges.setdefault(b, {})[a] = (reverse, fares)
+        self._tree = BKTree(self.names)
+        # Longest names first so "varanasi junction" wins over "varanasi"
+        self._by_length = sorted(self.names, key=len, reverse=True)
+        self._by_length += sorted(set(self.aliases) - set(self.names), key=len, reverse=True)
+
+    def resolve_stop(self, text: str) -> Optional[str]:
+        key = _stop_key(text)
+        key = " ".join(t for t in key.split() if t not in _FILLER and t not in _MODE_WORDS)
+        if not key:
+            return None
+        if key in self.names:
+            return key
+        if key in self.aliases:
+            return self.aliases[key]
+        contained = [s for s in self._by_length if re.search(rf"\b{re.escape(s)}\b", key)]
+        if contained:
+            return self.aliases.get(contained[0], contained[0])
+        containing = [s for s in self.names if re.search(rf"\b{re.escape(key)}\b", s)]
+        if len(containing) == 1:
+            return containing[0]
+        max_edits = 1 if len(key) <= 5 else 2 if len(key) <= 12 else 3
+        hits = self._tree.search(key, max_edits)
+        if hits and (len(hits) == 1 or hits[0][0] < hits[1][0]):
+            return hits[0][1]
+        return None
+
+    def _mentions(self, text: str) -> List[str]:
+        """Stops named in the text, in order of appearance."""
+        found: List[Tuple[int, str]] = []
+        taken: List[Tuple[int, int]] = []
+        for s in self._by_length:
+            m = re.search(rf"\b{re.escape(s)}\b", text)
+            if m and not any(m.start() < e and b < m.end() for b, e in taken):
+                found.append((m.start(), self.aliases.get(s, s)))
+                taken.append((m.start(), m.end()))
+        return [s for _, s in sorted(found)]
+
+    def endpoints(self, query: str) -> Optional[Tuple[str, str]]:
+        q = normalize_text(query, strip_punct=True)
+        for pattern in _ROUTE_RES:
+            m = pattern.search(q)
+            if m:
+                src, dst = self.resolve_stop(m.group(1)), self.resolve_stop(m.group(2))
+                if src and dst and src != dst:
+                    return src, dst
+        stops = self._mentions(q)
+        if len(stops) >= 2 and stops[0] != stops[1]:
+            return stops[0], stops[1]
+        return None
+
+    def _dijkstra(self, src: str, dst: str, mode: str, max_hops: int) -> Optional[Tuple[float, List[Dict[str, Any]]]]:
+        """(total mid-range fare, leg records) of the cheapest src -> dst path priced in one mode."""
+        # (cost, hops, tiebreak, node, legs); the counter keeps heapq from comparing leg dicts
+        heap: List[Tuple[float, int, int, str, Tuple[Dict[str, Any], ...]]] = [(0.0, 0, 0, src, ())]
+        best: Dict[Tuple[str, int], float] = {(src, 0): 0.0}
+        pushed = 0
+        while heap:
+            cost, hops, _, node, legs = heapq.heappop(heap)
+            if node == dst:
+                return cost, list(legs)
+            if hops >= max_hops or cost > best.get((node, hops), float("inf")):
+                continue
+            for nxt, (record, fares) in self.edges.get(node, {}).items():
+                rng = fares.get(mode)
+                if rng is None:
+                    continue
+                total = cost + (rng[0] + rng[1]) / 2
+                if total < best.get((nxt, hops + 1), float("inf")):
+                    best[(nxt, hops + 1)] = total
+                    pushed += 1
+                    heapq.heappush(heap, (total, hops + 1, pushed, nxt, legs + (record,)))
+        return None
+
+    def shortest_path(self, src: str, dst: str, mode: Optional[str] = None, max_hops: int = TRANSPORT_MAX_HOPS) -> Optional[List[Dict[str, Any]]]:
+        """Cheapest leg records from src to dst by mid-range fare, or None.
+
+        Every leg is priced in the same mode: the given one, else whichever mode
+        gives the cheapest whole route (one Dijkstra per mode).
+        """
+        found = [p for m in ([mode] if mode else MODES) if (p := self._dijkstra(src, dst, m, max_hops))]
+        return min(found, key=lambda p: p[0])[1] if found else None
+
+    def route(self, query: str) -> Optional[List[Dict[str, Any]]]:
+        """Legs for a 'from X to Y' query; the mode named in the query (auto/cab/bike) is priced first."""
+        ends = self.endpoints(query)
+        if ends is None:
+            return None
+        tokens = normalize_text(query, strip_punct=True).split()
+        mode = next((_MODE_WORDS[t] for t in tokens if t in _MODE_WORDS), None)
+        path = self.shortest_path(*ends, mode=mode) if mode else None
+        return path or self.shortest_path(*ends)
+
+
+@lru_cache(maxsize=16)
+def get_transport_graph(city: str) -> TransportGraph:
+    return TransportGraph(load_records(city.lower(), "transport"))
+
+
+__all__ = ["TransportGraph", "get_transport_graph", "parse_price_range"]
@@ -1,100 +1,16 @@
 #!/usr/bin/env python3
 """
 Split Ayodhya.json into individual category files with _id metadata.
-Similar to other city scripts but for Ayodhya city.
 
-Input: data/ayodhya/Ayodhya.json
-Output: data/ayodhya/Category_ayodhya.json files (12 categories)
-
-Removes __v fields and preserves all other data including _id.
+Kept for existing workflows; same as `python split_city_data.py ayodhya --input data/ayodhya/Ayodhya.json`.
 """
 
-import json
-import os
-from pathlib import Path
+from split_city_data import DATA_ROOT, split_city_data
+
 
 def split_ayodhya_data():
-    # Paths
-    base_dir = Path("data/ayodhya")
-    input_file = base_dir / "Ayodhya.json"
-    
-    if not input_file.exists():
-        print(f"❌ Error: {input_file} not found!")
-        return
-    
-    # Load main file
-    print(f"📖 Loading {input_file}...")
-    with open(input_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    print(f"✅ Found {len(data)} categories in Ayodhya.json")
-    
-    # Category mapping (lowercase from file → PascalCase for filenames)
-    # Keep consistent with other cities (lowercase keys in files)
-    category_mapping = {
-        'accommodation': 'Accommodation',
-        'activity': 'Activity', 
-        'cityinfo': 'Cityinfo',  # Keep lowercase in key for consistency
-        'connectivity': 'Connectivity',
-        'food': 'Food',
-        'hiddengem': 'Hiddengem',  # Keep lowercase in key for consistency
-        'itinerary': 'Itinerary',
-        'misc': 'Misc',
-        'nearbyspot': 'Nearbyspot',  # Keep lowercase in key for consistency
-        'place': 'Place',
-        'shop': 'Shop',
-        'transport': 'Transport',
-    }
-    
-    total_processed = 0
-    
-    print(f"\\n📝 Creating Ayodhya category files...")
-    
-    for source_key, target_category in category_mapping.items():
-        if source_key not in data:
-            print(f"⚠️  Category '{source_key}' not found in Ayodhya.json")
-            continue
-            
-        items = data[source_key]
-        if not isinstance(items, list):
-            print(f"⚠️  Category '{source_key}' is not a list, skipping")
-            continue
-        
-        # Remove __v field from each item and preserve everything else
-        cleaned_items = []
-        items_with_id = 0
-        
-        for item in items:
-            if isinstance(item, dict):
-                # Create a copy without __v field
-                cleaned_item = {k: v for k, v in item.items() if k != '__v'}
-                cleaned_items.append(cleaned_item)
-                
-                # Count items with _id
-                if '_id' in cleaned_item and cleaned_item['_id']:
-                    items_with_id += 1
-            else:
-                cleaned_items.append(item)
-        
-        # Create output file with lowercase key (consistent with other cities)
-        output_file = base_dir / f"{target_category}_ayodhya.json"
-        output_data = {source_key: cleaned_items}  # Use original lowercase key
-        
-        # Write to file
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
-        
-        print(f"✅ {target_category:12} → {output_file.name:25} ({len(cleaned_items)} items, {items_with_id} with _id)")
-        total_processed += len(cleaned_items)
-    
-    print(f"\\n🎉 Successfully processed {total_processed} items from Ayodhya!")
-    print(f"📁 Files created in: {base_dir}")
-    
-    # Verify all files were created
-    created_files = list(base_dir.glob("*_ayodhya.json"))
-    print(f"\\n📋 Created files ({len(created_files)}):")
-    for file in sorted(created_files):
-        print(f"   • {file.name}")
+    split_city_data("ayodhya", DATA_ROOT / "ayodhya" / "Ayodhya.json")
+
 
 if __name__ == "__main__":
     split_ayodhya_data()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Split a city export (data/<city>/<City> (1).json) into its category files.
+
+Usage: python split_city_data.py <city> [--input PATH]
+
+The export is one object of category -> list of records. It is parsed
+incrementally with json.JSONDecoder.raw_decode, one record at a time, and
+each record is written to data/<city>/<Category>_<city>.json as soon as it
+has been read, so memory stays flat however large the export grows.
+
+Output matches json.dump(..., indent=2, ensure_ascii=False) of
+{category: records} with __v dropped from every record. Each file is written
+to a temp file and moved into place with os.replace; when the new content
+hashes the same as the existing file, the existing file (and its mtime, which
+the response cache keys on) is left untouched.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Iterator, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from service.city_data import CATEGORY_NAMESPACES, DATA_ROOT, category_file
+
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_WS = " \t\n\r"
+_DELIMS = ",]}" + _WS
+
+
+class _Stream:
+    """Character buffer over a text file that refills on demand."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, ch: str) -> None:
+        got = self.peek()
+        if got != ch:
+            raise ValueError(f"expected {ch!r}, got {got!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode one JSON value, reading more input until it is complete."""
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number is only complete once a delimiter follows it: "1." or "-"
+                # at the buffer edge decodes as a shorter number or not at all
+                number = isinstance(obj, (int, float)) and not isinstance(obj, bool)
+                if self.eof or (end < len(self.buf) and (not number or self.buf[end] in _DELIMS)):
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            if not self._fill():
+                obj, self.pos = _decoder.raw_decode(self.buf, self.pos)
+                return obj
+
+
+def iter_sections(f) -> Iterator[Tuple[str, bool, Any]]:
+    """Yield (key, is_list, value) per top-level member; list values come back as lazy item iterators.
+
+    Each item iterator must be exhausted before the next section is requested.
+    """
+    s = _Stream(f)
+    s.expect("{")
+    if s.peek() == "}":
+        return
+    while True:
+        key = s.value()
+        s.expect(":")
+        if s.peek() == "[":
+            s.pos += 1
+            yield key, True, _iter_items(s)
+        else:
+            yield key, False, s.value()
+        if s.peek() == ",":
+            s.pos += 1
+            continue
+        s.expect("}")
+        return
+
+
+def _iter_items(s: _Stream) -> Iterator[Any]:
+    if s.peek() == "]":
+        s.pos += 1
+        return
+    while True:
+        yield s.value()
+        if s.peek() == ",":
+            s.pos += 1
+            continue
+        s.expect("]")
+        return
+
+
+def _file_hash(path: Path) -> Optional[str]:
+    if not path.exists():
+        return None
+    h = hashlib.blake2b()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def write_section(path: Path, key: str, items: Iterator[Any]) -> Tuple[int, int, bool]:
+    """Stream one category to `path`; returns (items, items with _id, rewritten)."""
+    tmp = path.with_name(path.name + ".tmp")
+    h = hashlib.blake2b()
+    count = with_id = 0
+
+    with tmp.open("w", encoding="utf-8", newline="\n") as out:
+        def emit(text: str) -> None:
+            out.write(text)
+            h.update(text.encode("utf-8"))
+
+        emit("{\n  " + json.dumps(key, ensure_ascii=False) + ": [")
+        for item in items:
+            if isinstance(item, dict):
+                item = {k: v for k, v in item.items() if k != "__v"}
+                if item.get("_id"):
+                    with_id += 1
+            body = json.dumps(item, indent=2, ensure_ascii=False).replace("\n", "\n    ")
+            emit(("\n    " if count == 0 else ",\n    ") + body)
+            count += 1
+        emit("\n  ]\n}" if count else "]\n}")
+
+    if h.hexdigest() == _file_hash(path):
+        tmp.unlink()
+        return count, with_id, False
+    os.replace(tmp, path)
+    return count, with_id, True
+
+
+def _output_path(city_dir: Path, city: str, category: str) -> Path:
+    # Reuse the existing file's casing (CityInfo_rishikesh.json vs Cityinfo_agra.json)
+    existing = category_file(city, category)
+    return existing if existing is not None else city_dir / f"{category.capitalize()}_{city}.json"
+
+
+def split_city_data(city: str, input_file: Optional[Path] = None) -> None:
+    city = city.lower()
+    city_dir = DATA_ROOT / city
+    if input_file is None:
+        candidates = [city_dir / f"{city.title()} (1).json", city_dir / f"{city.title()}.json"]
+        input_file = next((p for p in candidates if p.exists()), candidates[0])
+    if not input_file.exists():
+        print(f"❌ Error: {input_file} not found!")
+        return
+
+    print(f"📖 Streaming {input_file}...")
+    total = written = unchanged = 0
+    with input_file.open("r", encoding="utf-8") as f:
+        for key, is_list, items in iter_sections(f):
+            if not is_list:
+                print(f"⚠️  Category '{key}' is not a list, skipping")
+                continue
+            if key not in CATEGORY_NAMESPACES:
+                print(f"⚠️  Unknown category '{key}', skipping")
+                for _ in items:
+                    pass
+                continue
+            path = _output_path(city_dir, city, key)
+            count, with_id, rewritten = write_section(path, key, items)
+            total += count
+            if rewritten:
+                written += 1
+                print(f"✅ {key:13} → {path.name:35} ({count} items, {with_id} with _id)")
+            else:
+                unchanged += 1
+                print(f"➖ {key:13} → {path.name:35} unchanged ({count} items)")
+
+    print(f"\n🎉 {city.title()}: {total} items, {written} files written, {unchanged} unchanged")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Split a city export into data/<city>/<Category>_<city>.json files.")
+    parser.add_argument("city")
+    parser.add_argument("--input", type=Path, help="export file (default: data/<city>/<City> (1).json, then <City>.json)")
+    args = parser.parse_args(argv)
+    split_city_data(args.city, args.input)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+import io
+import json
+
+import pytest
+
+import split_city_data
+from split_city_data import iter_sections
+
+
+def _parse(text):
+    return {key: list(value) if is_list else value for key, is_list, value in iter_sections(io.StringIO(text))}
+
+
+@pytest.mark.parametrize("chunk", [1, 2, 3, 5, 1 << 16])
+def test_numbers_split_across_chunks(monkeypatch, chunk):
+    monkeypatch.setattr(split_city_data, "CHUNK_SIZE", chunk)
+    text = '{"a":[1.5e10, -3, 0.25,7], "b": {"n": -12.5e-3}, "c": [true, null, "x"], "d": 42}'
+    assert _parse(text) == json.loads(text)